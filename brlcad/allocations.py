@@ -0,0 +1,151 @@
+"""
+Opt-in accounting of the memory allocated on the BRL-CAD side by python code.
+
+The blocks allocated via bu_malloc (see ctypes_adaptors.brlcad_new and friends) and the
+internals decoded by WDB.lookup_handle are not managed by python: they are either freed by
+BRL-CAD code which takes ownership, freed explicitly (e.g. by closing the handle), or they leak. While a tracker is active
+(see track_allocations), every such allocation is registered with a tag, and unregistered
+when it is freed or handed over to BRL-CAD, so the outstanding allocations can be reported.
+When no tracker is active the hooks return immediately, so tracking costs nothing by default.
+
+Example:
+>>> with track_allocations() as tracker:
+...     allocated(1, "mk_arbn", size=96)
+...     allocated(2, "mk_arbn", size=96)
+...     released(1)
+>>> tracker.outstanding()
+{'mk_arbn': (1, 96)}
+"""
+from contextlib import contextmanager
+
+
+class AllocationTracker(object):
+    """
+    Keeps the live allocations (key -> (tag, size, release function)) and per tag counters.
+    The keys are typically the addresses of the allocated memory.
+    """
+
+    def __init__(self):
+        self.live = {}
+        self.allocation_counts = {}
+        self.release_counts = {}
+
+    def track(self, key, tag, size=0, release=None):
+        """
+        Registers a new allocation. The optional <release> function frees the memory,
+        it is used by release_all to deterministically free the outstanding allocations.
+        """
+        self.live[key] = (tag, size, release)
+        self.allocation_counts[tag] = self.allocation_counts.get(tag, 0) + 1
+
+    def untrack(self, key):
+        """
+        Unregisters an allocation which was freed or handed over to BRL-CAD code.
+        Unknown keys are ignored, they were allocated before the tracker was activated.
+        """
+        entry = self.live.pop(key, None)
+        if entry is not None:
+            self.release_counts[entry[0]] = self.release_counts.get(entry[0], 0) + 1
+
+    def outstanding(self):
+        """
+        Returns the allocations which were not released yet, as a dict: tag -> (count, size).
+        """
+        result = {}
+        for tag, size, release in self.live.itervalues():
+            count, total_size = result.get(tag, (0, 0))
+            result[tag] = (count + 1, total_size + size)
+        return result
+
+    def release_all(self):
+        """
+        Frees all outstanding allocations which have a release function, returns the number of freed allocations.
+        """
+        releasable = [(key, release) for key, (tag, size, release) in self.live.iteritems() if release]
+        for key, release in releasable:
+            try:
+                release()
+            finally:
+                self.untrack(key)
+        return len(releasable)
+
+    def report(self):
+        lines = []
+        for tag in sorted(self.allocation_counts):
+            lines.append("{0}: allocated={1}, released={2}".format(
+                tag, self.allocation_counts[tag], self.release_counts.get(tag, 0)
+            ))
+        outstanding = self.outstanding()
+        for tag in sorted(outstanding):
+            lines.append("outstanding {0}: count={1}, size={2}".format(tag, *outstanding[tag]))
+        return "\n".join(lines)
+
+
+# the active trackers, all of them are notified of each allocation:
+_trackers = []
+# the keys allocated in the currently open handover scopes:
+_handover_scopes = []
+
+
+def is_tracking():
+    return bool(_trackers)
+
+
+def allocated(key, tag, size=0, release=None):
+    """
+    Hook called for each allocation made on the BRL-CAD side.
+    """
+    if not _trackers:
+        return
+    for tracker in _trackers:
+        tracker.track(key, tag, size=size, release=release)
+    if _handover_scopes:
+        _handover_scopes[-1].append(key)
+
+
+def released(key):
+    """
+    Hook called when an allocation is freed or handed over to BRL-CAD code.
+    """
+    for tracker in _trackers:
+        tracker.untrack(key)
+
+
+@contextmanager
+def track_allocations(release=False):
+    """
+    Activates a new AllocationTracker for the duration of the with block. If <release> is True,
+    the outstanding allocations which can be freed (e.g. the internals decoded by WDB.lookup_handle)
+    are freed on exit: the primitives looked up in the block must not be used after that,
+    as their data points to the freed memory.
+    """
+    tracker = AllocationTracker()
+    _trackers.append(tracker)
+    try:
+        yield tracker
+    finally:
+        _trackers.remove(tracker)
+        if release:
+            tracker.release_all()
+
+
+@contextmanager
+def handover():
+    """
+    The allocations made in the with block are handed over to BRL-CAD code if the block exits
+    normally: the libwdb functions free the data they are passed. On errors the allocations stay
+    outstanding, as they were probably leaked.
+    """
+    keys = []
+    _handover_scopes.append(keys)
+    try:
+        yield
+    finally:
+        _handover_scopes.pop()
+    for key in keys:
+        released(key)
+
+
+if __name__ == "__main__":
+    import doctest
+    doctest.testmod()
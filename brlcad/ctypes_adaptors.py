@@ -1,7 +1,9 @@
 from collections import Iterable
 import ctypes
+import sys
 from numbers import Number
 from brlcad.exceptions import BRLCADException
+from brlcad import allocations
 from brlcad.vmath import Plane
 import numpy as np
 import brlcad._bindings.libbn as libbn
@@ -15,9 +17,10 @@ def brlcad_new(obj_type, debug_msg=None):
     Needed for creating objects which will be freed by BRL-CAD code.
     """
     if not debug_msg:
-        debug_msg = obj_type.__class__.__name__
+        debug_msg = obj_type.__name__
     count = ctypes.sizeof(obj_type)
     obj_buf = libbn.bu_malloc(count, debug_msg)
+    allocations.allocated(obj_buf, debug_msg, size=count)
     return obj_type.from_address(obj_buf)
 
 
@@ -28,9 +31,41 @@ def brlcad_copy(obj, debug_msg):
     """
     count = ctypes.sizeof(obj)
     obj_copy = libbn.bu_malloc(count, debug_msg)
+    allocations.allocated(obj_copy, debug_msg, size=count)
     ctypes.memmove(obj_copy, ctypes.addressof(obj), count)
     return type(obj).from_address(obj_copy)
 
+def brlcad_ndarray(shape, dtype=np.float64, debug_msg="ndarray"):
+    """
+    Returns a writable numpy array of the given <shape> and <dtype> over memory allocated via bu_malloc.
+    Used for data passed to BRL-CAD code which takes ownership and frees it: the array
+    can be filled in place, and then passed on without any extra copy (see ndarray.ctypes.data_as).
+    The array does not own it's memory: if it's not passed to BRL-CAD it must be freed via bu_free,
+    and it must not be used anymore after BRL-CAD freed it.
+    """
+    dtype = np.dtype(dtype)
+    count = int(np.prod(shape))
+    # bu_malloc bombs on 0 size requests:
+    byte_count = max(count * dtype.itemsize, 1)
+    address = libbn.bu_malloc(byte_count, debug_msg)
+    allocations.allocated(address, debug_msg, size=byte_count)
+    buffer = (ctypes.c_ubyte * byte_count).from_address(address)
+    return np.ctypeslib.as_array(buffer)[0:count * dtype.itemsize].view(dtype).reshape(shape)
+
+
+def brlcad_array2d(row_sizes, data_type=ctypes.c_double, debug_msg="array2d"):
+    """
+    Allocates a 2D array (an array of row pointers) via bu_malloc, with one block per row
+    as BRL-CAD code frees the rows one by one (e.g. the ARS curves).
+    Returns (pointer, rows), where <rows> are the brlcad_ndarray views of the rows, to be filled in place.
+    """
+    dtype = NUMPY_TYPES[data_type]
+    rows = [brlcad_ndarray((size,), dtype=dtype, debug_msg=debug_msg) for size in row_sizes]
+    row_pointers = brlcad_ndarray((len(rows),), dtype=np.uintp, debug_msg=debug_msg)
+    row_pointers[:] = [row.ctypes.data for row in rows]
+    return row_pointers.ctypes.data_as(ctypes.POINTER(ctypes.POINTER(data_type))), rows
+
+
 def bit_set(bitv, bit):
     """
     :param bitv: libbu.bu_bitv structure
@@ -56,6 +91,63 @@ def bit_clear(bitv, bit):
     bit_array = ctypes.cast(ctypes.byref(bitv.contents.bits), ctypes.POINTER(ctypes.c_ubyte))
     bit_array[(bit >> libbu.BU_BITV_SHIFT)] &= (~(1 << (bit & libbu.BU_BITV_MASK)))
 
+def _bitv_bytes(bitv, bit_count):
+    """
+    Returns the address of the bits of the libbu.bu_bitv structure <bitv>, together with
+    the number of bytes needed to hold <bit_count> bits, rounded up to whole bitv_t words.
+    """
+    bits = bitv.contents.bits
+    word_bits = 8 * ctypes.sizeof(bits._type_)
+    word_count = (bit_count + word_bits - 1) // word_bits
+    return ctypes.addressof(bits), word_count * (word_bits // 8)
+
+
+def _swap_bitv_words(byte_array, bitv):
+    """
+    The bits are numbered from the least significant bit of each bitv_t word,
+    on big endian machines the bytes of the words need to be reversed to get
+    the bits numbered from the first byte on.
+    """
+    if sys.byteorder == "little":
+        return byte_array
+    word_size = ctypes.sizeof(bitv.contents.bits._type_)
+    return byte_array.reshape(-1, word_size)[:, ::-1].ravel()
+
+
+def bitv_from_bool_array(mask):
+    """
+    Returns a new libbu.bu_bitv structure with the kth bit set for each True value in <mask>.
+    The bits are packed in one numpy call and copied with one memmove,
+    instead of setting them one by one as bit_set does.
+    :param mask: sequence of bool values
+    """
+    mask = np.asarray(mask, dtype=np.bool_).ravel()
+    bitv = libbu.bu_bitv_new(len(mask))
+    address, byte_count = _bitv_bytes(bitv, len(mask))
+    if byte_count:
+        padded = np.zeros(byte_count * 8, dtype=np.bool_)
+        padded[0:len(mask)] = mask
+        # np.packbits stores the first bit in the most significant position, bu_bitv in the least significant:
+        packed = np.packbits(padded.reshape(-1, 8)[:, ::-1], axis=1).ravel()
+        packed = np.ascontiguousarray(_swap_bitv_words(packed, bitv))
+        ctypes.memmove(address, packed.ctypes.data, byte_count)
+    return bitv
+
+
+def bool_array_from_bitv(bitv, bit_count):
+    """
+    Returns the first <bit_count> bits of the libbu.bu_bitv structure <bitv> as a numpy bool array,
+    copied with one memmove and unpacked in one numpy call, instead of testing them one by one as bit_test does.
+    """
+    address, byte_count = _bitv_bytes(bitv, bit_count)
+    packed = np.empty(byte_count, dtype=np.uint8)
+    if byte_count:
+        ctypes.memmove(packed.ctypes.data, address, byte_count)
+    packed = _swap_bitv_words(packed, bitv)
+    bits = np.unpackbits(packed.reshape(-1, 1), axis=1)[:, ::-1]
+    return bits.ravel()[0:bit_count].astype(np.bool_)
+
+
 def iterate_numbers(container):
     """
     Iterator which flattens nested hierarchies of geometry to plain list of numbers.
@@ -80,6 +172,35 @@ def iterate_numbers(container):
         raise BRLCADException("Can't extract numbers from type: {0}".format(type(container)))
 
 
+# maps the ctypes types to the numpy dtype with the same memory layout
+NUMPY_TYPES = {
+    ctypes.c_double: np.float64,
+    ctypes.c_int: np.intc,
+}
+
+
+def ndarray_buffer(value, data_type=ctypes.c_double):
+    """
+    Fast path for numpy input: returns a flat ctypes array of <data_type> over the data in <value>.
+    If <value> is a C-contiguous array of the matching dtype, the returned ctypes array points
+    directly to it's memory, otherwise the data is converted in one numpy call (no per element
+    python iteration). The returned ctypes array keeps a reference to the numpy array,
+    so the memory stays valid as long as the ctypes object is alive.
+    >>> x = np.array([[1, 2], [3, 4]], dtype=np.float64)
+    >>> y = ndarray_buffer(x)
+    >>> x[1, 0] = 5
+    >>> list(y)
+    [1.0, 2.0, 5.0, 4.0]
+    >>> list(ndarray_buffer(np.arange(3), data_type=ctypes.c_int))
+    [0, 1, 2]
+    """
+    array = np.ascontiguousarray(value, dtype=NUMPY_TYPES[data_type])
+    array_type = data_type * array.size
+    if array.flags.writeable:
+        return array_type.from_buffer(array)
+    return array_type.from_buffer_copy(array)
+
+
 def flatten_numbers(container):
     """
     Flattens nested hierarchies of geometry to plain list of doubles.
@@ -97,6 +218,11 @@ def point(p, point_size=3):
 def doubles(p, double_count=None, flatten=True):
     if double_count == 0:
         return None
+    if isinstance(p, np.ndarray):
+        actual_count = p.size
+        if double_count is not None and double_count != actual_count:
+            raise BRLCADException("Expected {0} doubles, got: {1}".format(double_count, actual_count))
+        return ndarray_buffer(p) if actual_count else None
     if not p:
         if double_count is None:
             return None
@@ -115,7 +241,10 @@ def doubles(p, double_count=None, flatten=True):
 def points(p, point_count=None, point_size=3):
     if point_count == 0:
         return None
-    fp = [x for x in iterate_numbers(p)]
+    if isinstance(p, np.ndarray):
+        fp = ndarray_buffer(p)
+    else:
+        fp = [x for x in iterate_numbers(p)]
     double_count = len(fp)
     if point_count is not None:
         expected_count = point_count * point_size
@@ -123,7 +252,9 @@ def points(p, point_count=None, point_size=3):
             raise BRLCADException("Expected {} doubles, got: {}".format(expected_count, double_count))
     if double_count % point_size != 0:
         raise BRLCADException("Expected {}-tuples, got {} doubles !".format(point_size, double_count))
-    return ctypes.cast((ctypes.c_double * double_count)(*fp), ctypes.POINTER(ctypes.c_double * point_size))
+    if not isinstance(fp, ctypes.Array):
+        fp = (ctypes.c_double * double_count)(*fp)
+    return ctypes.cast(fp, ctypes.POINTER(ctypes.c_double * point_size))
 
 
 def points2D(p, point_count=None):
@@ -158,26 +289,165 @@ def plane_from_pointer(t):
     return Plane(normal, distance)
 
 
-def transform_from_pointer(t):
-    return [t[x] for x in xrange(0, 16)]
+class MemoryLifetime(object):
+    """
+    Marks if the BRL-CAD memory viewed by ArrayViews is still allocated. The views created while
+    the lifetime is active (in it's with block) check it when used, and raise a BRLCADException
+    after the memory was marked as freed, instead of silently reading freed memory.
+    """
+
+    _active = []
+
+    def __init__(self):
+        self.freed = False
+
+    @staticmethod
+    def current():
+        return MemoryLifetime._active[-1] if MemoryLifetime._active else None
+
+    def __enter__(self):
+        MemoryLifetime._active.append(self)
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        MemoryLifetime._active.pop()
+        return False
 
 
-def array2d_from_pointer(t, num_rows, num_cols):
-    result = [[t[y][x] for x in range(num_cols)] for y in range(num_rows)]
-    return np.array(result)
+class ArrayView(np.ndarray):
+    """
+    Numpy view over memory which is not owned by python, e.g. an array held in
+    a BRL-CAD internal structure. The <owner> attribute is the lifetime handle
+    of the memory: it references the object the memory belongs to, keeping it alive
+    as long as the view (or any view derived from it) is alive. The view is only
+    valid as long as the owner's memory is not freed on the BRL-CAD side: if the view
+    was created with a MemoryLifetime, indexing it, using it in numpy operations
+    or copying it raises a BRLCADException once that memory was freed.
+    Numpy functions converting the view to a plain array (e.g. np.asarray) are not checked.
+    """
+
+    def __array_finalize__(self, obj):
+        self.owner = getattr(obj, "owner", None)
+        self.lifetime = getattr(obj, "lifetime", None)
+
+    def check_lifetime(self):
+        if self.lifetime is not None and self.lifetime.freed:
+            raise BRLCADException("Array view used after it's memory was freed")
+
+    def _detached(self, result):
+        # results not sharing the viewed memory (copies, ufunc outputs) are not bound to it's lifetime:
+        if isinstance(result, ArrayView) and not np.may_share_memory(result, self):
+            result.owner = result.lifetime = None
+        return result
+
+    def __getitem__(self, index):
+        self.check_lifetime()
+        return self._detached(np.ndarray.__getitem__(self, index))
+
+    def __setitem__(self, index, value):
+        self.check_lifetime()
+        np.ndarray.__setitem__(self, index, value)
+
+    def __array_prepare__(self, out_arr, context=None):
+        self.check_lifetime()
+        return self._detached(np.ndarray.__array_prepare__(self, out_arr, context))
+
+    def __array_wrap__(self, out_arr, context=None):
+        self.check_lifetime()
+        return self._detached(np.ndarray.__array_wrap__(self, out_arr, context))
+
+    def tolist(self):
+        self.check_lifetime()
+        return np.ndarray.tolist(self)
+
+    def copy(self, order="C"):
+        """
+        A copy owns it's memory, so it is returned as a plain numpy array.
+        """
+        self.check_lifetime()
+        return np.array(self, order=order, copy=True, subok=False)
+
+
+def ndarray_from_pointer(pointer, shape, owner=None):
+    """
+    Returns an ArrayView of the given <shape> over the memory of the ctypes <pointer> (or ctypes array),
+    without copying any data. The <owner> is the lifetime handle of the memory, typically the
+    ctypes structure holding the pointer.
+    >>> x = (ctypes.c_double * 6)(1, 2, 3, 4, 5, 6)
+    >>> y = ndarray_from_pointer(ctypes.cast(x, ctypes.POINTER(ctypes.c_double)), (2, 3), owner=x)
+    >>> x[4] = 7
+    >>> y[1].tolist()
+    [4.0, 7.0, 6.0]
+    >>> y[1].owner is x
+    True
+    >>> with MemoryLifetime() as lifetime:
+    ...     y = ndarray_from_pointer(ctypes.cast(x, ctypes.POINTER(ctypes.c_double)), (2, 3), owner=x)
+    >>> z = y[1] + 1
+    >>> lifetime.freed = True
+    >>> z.tolist()
+    [5.0, 8.0, 7.0]
+    >>> y[1]
+    Traceback (most recent call last):
+    ...
+    BRLCADException: Array view used after it's memory was freed
+    >>> ndarray_from_pointer(ctypes.POINTER(ctypes.c_int)(), (0, 3)).shape
+    (0, 3)
+    >>> ndarray_from_pointer(ctypes.POINTER(ctypes.c_int)(), (2, 3))
+    Traceback (most recent call last):
+    ...
+    BRLCADException: NULL pointer for array of shape: (2, 3)
+    """
+    if not isinstance(pointer, ctypes.Array) and not np.prod(shape):
+        result = np.empty(shape, dtype=pointer._type_).view(ArrayView)
+    elif not isinstance(pointer, ctypes.Array) and not pointer:
+        raise BRLCADException("NULL pointer for array of shape: {0}".format(shape))
+    else:
+        result = np.ctypeslib.as_array(pointer, shape=shape).view(ArrayView)
+    result.owner = owner if owner is not None else pointer
+    result.lifetime = MemoryLifetime.current()
+    return result
+
+
+def planes_from_pointer(t, count, owner=None):
+    """
+    Returns a (count, 4) view over an array of planes (plane_t *).
+    """
+    return ndarray_from_pointer(ctypes.cast(t, ctypes.POINTER(ctypes.c_double)), (count, 4), owner=owner)
+
+
+def transform_from_pointer(t, owner=None):
+    return ndarray_from_pointer(t, (16,), owner=owner)
+
+
+def array2d_from_pointer(t, num_rows, num_cols, owner=None):
+    """
+    Returns a list of views over the rows of the 2D array <t> (a pointer to row pointers).
+    """
+    return [ndarray_from_pointer(t[y], (num_cols,), owner=owner) for y in xrange(0, num_rows)]
 
 
 def array2d_fixed_cols(t, num_cols_fixed=5, use_brlcad_malloc=False):
-    result = brlcad_new((ctypes.c_double * num_cols_fixed)*len(t), "metaball array")
-    for i in range(len(t)):
-        if use_brlcad_malloc:
-            result[i] = brlcad_copy(doubles(t[i],double_count=num_cols_fixed), "metaball point")
-        else:
-            result[i] = doubles(t[i],double_count=num_cols_fixed)
-    return ctypes.cast(result, ctypes.POINTER(ctypes.c_double * num_cols_fixed))
+    if isinstance(t, np.ndarray):
+        values = t
+    else:
+        values = [flatten_numbers(row) for row in t]
+    if use_brlcad_malloc:
+        result = brlcad_ndarray((len(values), num_cols_fixed), debug_msg="array2d_fixed_cols")
+    else:
+        result = np.empty((len(values), num_cols_fixed), dtype=np.float64)
+    try:
+        result[:] = values
+    except ValueError:
+        raise BRLCADException("Expected rows of {0} doubles, got: {1}".format(num_cols_fixed, values))
+    return ctypes.cast(ndarray_buffer(result), ctypes.POINTER(ctypes.c_double * num_cols_fixed))
 
 
 def array2d(t, data_type=ctypes.c_double, use_brlcad_malloc=False):
+    if use_brlcad_malloc:
+        result, rows = brlcad_array2d([len(row) for row in t], data_type=data_type)
+        for row, values in zip(rows, t):
+            row[:] = values
+        return result
     arrays = []
     if data_type==ctypes.c_double:
         data_func = float
@@ -187,16 +457,10 @@ def array2d(t, data_type=ctypes.c_double, use_brlcad_malloc=False):
     for i in range(len(t)):
         array = ((data_type * len(t[i]))(*([data_func(k) for k in t[i]])))
         arrays.append(array)
-    if use_brlcad_malloc:
-        result = (ctypes.POINTER(data_type) * len(arrays))(
-        *[ctypes.cast(brlcad_copy(array, "array2d"), ctypes.POINTER(data_type)) for array in arrays]
-    )
-        return ctypes.cast(brlcad_copy(result, "array2d"), ctypes.POINTER(ctypes.POINTER(data_type)))
-    else:
-        result = (ctypes.POINTER(data_type) * len(arrays))(
+    result = (ctypes.POINTER(data_type) * len(arrays))(
         *[ctypes.cast(array, ctypes.POINTER(data_type)) for array in arrays]
     )
-        return ctypes.cast(result, ctypes.POINTER(ctypes.POINTER(data_type)))
+    return ctypes.cast(result, ctypes.POINTER(ctypes.POINTER(data_type)))
 
 
 def transform(t, use_brlcad_malloc=False):
@@ -204,20 +468,28 @@ def transform(t, use_brlcad_malloc=False):
     Serializes a Transform-like object 't' (can be anything which will provide 16 floats)
     to the ctypes form of a transformation matrix as used by BRL-CAD code.
     """
-    fp = [x for x in iterate_numbers(t)]
+    if isinstance(t, np.ndarray):
+        fp = ndarray_buffer(t)
+    else:
+        fp = [x for x in iterate_numbers(t)]
     if len(fp) != 16:
         raise BRLCADException("Expected 16 doubles, got: {0}".format(len(fp)))
-    result = (ctypes.c_double * 16)(*fp)
+    result = fp if isinstance(fp, ctypes.Array) else (ctypes.c_double * 16)(*fp)
     if use_brlcad_malloc:
         result = brlcad_copy(result, "transform")
     return result
 
 
 def planes(values):
-    double_args = [x for x in iterate_numbers(values)]
+    if isinstance(values, np.ndarray):
+        double_args = ndarray_buffer(values)
+    else:
+        double_args = [x for x in iterate_numbers(values)]
     count = len(double_args)
     if count % 4 != 0:
         raise ValueError("Invalid parameter count ({}) for planes !".format(count))
+    if isinstance(double_args, ctypes.Array):
+        return double_args
     return (ctypes.c_double * count)(*double_args)
 
 
@@ -244,6 +516,8 @@ def rgb(values):
 
 
 def integers(values, flatten=True):
+    if isinstance(values, np.ndarray):
+        return ndarray_buffer(values, data_type=ctypes.c_int) if values.size else None
     if flatten:
         values = flatten_numbers(values)
     if not values:
@@ -256,6 +530,7 @@ def str_to_vls(value):
     Creates a VLS string with memory allocated by BRL-CAD code, must be also freed by BRL-CAD code.
     """
     result = libbn.bu_vls_vlsinit()
+    allocations.allocated(ctypes.addressof(result.contents), "bu_vls")
     if value is not None:
         libbn.bu_vls_strcat(result, libbn.String(value))
     return result.contents
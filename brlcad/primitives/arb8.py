@@ -5,11 +5,15 @@ saved internally as ARB8.
 """
 
 from base import Primitive
+from brlcad.vmath import PlaneSet
 import numpy as np
 
 
 class ARB8(Primitive):
 
+    # vertex indexes of the faces F1..F6
+    FACES = ((0, 1, 2, 3), (4, 5, 6, 7), (0, 1, 5, 4), (1, 2, 6, 5), (2, 3, 7, 6), (3, 0, 4, 7))
+
     def __init__(self, name, points, copy=False):
         """
         The points parameter is a sequence of 24(=8*3) floats.
@@ -168,6 +172,26 @@ class ARB8(Primitive):
 
     points = property(_get_points)
 
+    def plane_set(self):
+        """
+        The planes of the faces F1..F6 as a PlaneSet, with the normals pointing outwards,
+        for vectorized point tests against the ARB8. The faces collapsed to a line or
+        a point (for ARB4-ARB7) are left out.
+        """
+        vertices = np.asarray(self.point_mat, dtype=np.float64).reshape(8, 3)
+        faces = vertices[np.array(ARB8.FACES)]
+        # Newell's method, which works for faces with collapsed vertexes too:
+        normals = np.cross(faces, np.roll(faces, -1, axis=1)).sum(axis=1)
+        lengths = np.sqrt(np.einsum("ij,ij->i", normals, normals))
+        valid = ~np.isclose(lengths, 0)
+        normals = normals[valid] / lengths[valid, np.newaxis]
+        distances = np.einsum("ij,ij->i", normals, faces[valid].mean(axis=1))
+        # the centroid of the vertexes is inside the ARB8, orient all normals away from it:
+        flip = np.dot(normals, vertices.mean(axis=0)) > distances
+        normals[flip] *= -1
+        distances[flip] *= -1
+        return PlaneSet(np.column_stack((normals, distances)), copy=False)
+
     def copy(self):
         return ARB8(self.name, self.point_mat, copy=True)
 
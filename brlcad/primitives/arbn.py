@@ -3,14 +3,18 @@ Python wrapper for the ARBN primitive of BRL-CAD.
 """
 
 from base import Primitive
-from brlcad.vmath import Plane
+from brlcad.vmath import Plane, PlaneSet
+import brlcad.ctypes_adaptors as cta
 
 
 class ARBN(Primitive):
 
     def __init__(self, name, planes, copy=False):
         Primitive.__init__(self, name=name)
-        self.planes = [Plane.wrap(x, copy=copy) for x in planes]
+        if isinstance(planes, PlaneSet):
+            self.planes = planes.to_planes()
+        else:
+            self.planes = [Plane.wrap(x, copy=copy) for x in planes]
 
     def __repr__(self):
         return "ARBN({0}, {1})".format(self.name, repr(self.planes))
@@ -23,6 +27,12 @@ class ARBN(Primitive):
     def copy(self):
         return ARBN(self.name, self.planes, copy=True)
 
+    def plane_set(self):
+        """
+        The planes as a PlaneSet, for vectorized point tests against the ARBN.
+        """
+        return PlaneSet(self.planes)
+
     def has_same_data(self, other):
         # This will return False if the planes are in different order,
         # but for the purposes this method is used for that's actually what we want
@@ -32,5 +42,5 @@ class ARBN(Primitive):
     def from_wdb(name, data):
         return ARBN(
             name=name,
-            planes=[data.eqn[i] for i in range(0, data.neqn)]
+            planes=PlaneSet(cta.planes_from_pointer(data.eqn, data.neqn, owner=data))
         )
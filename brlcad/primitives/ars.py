@@ -31,7 +31,7 @@ class ARS(Primitive):
         Primitive.__init__(self, name=name)
         if test_curves(curves):
             if copy:
-                self.curves = [curve[:] for curve in curves]
+                self.curves = [curve.copy() if isinstance(curve, np.ndarray) else curve[:] for curve in curves]
             else:
                 self.curves = curves
         else:
@@ -74,10 +74,9 @@ class ARS(Primitive):
 
     @staticmethod
     def from_wdb(name, data):
-        ars_curves = cta.array2d_from_pointer(data.curves, data.ncurves, data.pts_per_curve*3)
-        curves = list([list(curve) for curve in ars_curves])
-        curves[0][3:] = []
-        curves[-1][3:] = []
+        curves = cta.array2d_from_pointer(data.curves, data.ncurves, data.pts_per_curve*3, owner=data)
+        curves[0] = curves[0][:3]
+        curves[-1] = curves[-1][:3]
         return ARS(
             name=name,
             curves=curves
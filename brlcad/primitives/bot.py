@@ -1,41 +1,89 @@
 """
 Python wrapper for BOT (Bag of Triangles) primitives of BRL-CAD.
 """
-import collections
 import numbers
 
 from base import Primitive
-from brlcad.vmath import Vector
+from brlcad.vmath import Vector, PointIndex, canonical_mesh
 from brlcad.exceptions import BRLCADException
-import brlcad._bindings.libbu as libbu
 import brlcad.ctypes_adaptors as cta
 import numpy as np
 
 
-class Face:
+def _reserve(array, min_length):
+    """
+    Returns <array> if it has room for <min_length> rows, otherwise a bigger copy of it.
+    The capacity is at least doubled on each reallocation, so appending rows one by one
+    is amortized O(1).
+    """
+    if len(array) >= min_length:
+        return array
+    result = np.empty((max(min_length, 2 * len(array), 16),) + array.shape[1:], dtype=array.dtype)
+    result[:len(array)] = array
+    return result
+
+
+def _column(values, dtype, length):
+    """
+    Returns <values> as an array of <dtype> and <length>, without copying if it already is one.
+    A single value is repeated <length> times.
+    """
+    result = np.asarray(values, dtype=dtype)
+    if result.shape != (length,):
+        result = np.empty(length, dtype=dtype)
+        result[:] = values
+    return result
+
+
+class Face(object):
     """
     Represents the face information in a bot.
-    Each face has three integer values representing vertex indices of the triangle
+    Each face has three integer values representing vertex indices of the triangle.
+    The faces returned by a BOT are lightweight views on the face arrays of the BOT,
+    created on demand. A face created from vertices is detached until it is added
+    to the BOT with BOT.add_face, after which it becomes a view too.
     """
-    def __init__(self, bot, vertices, index=None, copy=False):
+
+    __slots__ = ("bot", "position", "_index")
+
+    def __init__(self, bot, vertices=None, index=None, copy=False, position=None):
         self.bot = bot
-        self._points = list(vertices) if copy or not isinstance(vertices, list) else vertices
-        if index==None:
-            if len(vertices)==3:
-                self.index=[]
-                for i in xrange(0, len(self._points)):
-                    self.index.append(bot.vertex_index(self._points[i]))
-            else:
+        self.position = position
+        self._index = None
+        if position is not None:
+            return
+        if index is None:
+            if vertices is None or len(vertices) != 3:
                 raise BRLCADException("A face requires 3 vertices")
-        else:
-            self.index=index
+            index = [bot.vertex_index(vertex, copy=copy) for vertex in vertices]
+        self._index = np.array(index, dtype=np.int32)
+
+    def _attach(self, position):
+        self.position = position
+        self._index = None
+
+    @property
+    def index(self):
+        """
+        The 3 vertex indexes of the face, as int32 array.
+        """
+        if self.position is None:
+            return self._index
+        return self.bot.faces[self.position]
+
+    @property
+    def points(self):
+        """
+        The 3 vertices of the face, as float64 (3, 3) array.
+        """
+        return self.bot.vertices[self.index]
 
     def has_same_data(self, other):
-        return self.index == other.index
+        return np.array_equal(self.index, other.index)
 
     def __repr__(self):
         return "{}(points={})".format(
-            self.__class__.__name__, repr(self.index)
+            self.__class__.__name__, repr(self.index.tolist())
         )
 
 
@@ -46,14 +94,47 @@ class PlateFace(Face):
     otherwise thickness is centered about hit point
     """
 
-    def __init__(self, bot, vertices, thickness=1, face_mode=True, copy=False):
-        Face.__init__(self, bot, vertices, copy=copy)
-        self.thickness = thickness
-        self.face_mode = face_mode
+    __slots__ = ("_thickness", "_face_mode")
+
+    def __init__(self, bot, vertices=None, thickness=1, face_mode=True, copy=False, index=None, position=None):
+        Face.__init__(self, bot, vertices, index=index, copy=copy, position=position)
+        self._thickness = thickness
+        self._face_mode = face_mode
+
+    def _attach(self, position):
+        Face._attach(self, position)
+        self._thickness = None
+        self._face_mode = None
+
+    def _get_thickness(self):
+        if self.position is None:
+            return self._thickness
+        return self.bot.thickness[self.position]
+
+    def _set_thickness(self, value):
+        if self.position is None:
+            self._thickness = value
+        else:
+            self.bot.thickness[self.position] = value
+
+    thickness = property(fget=_get_thickness, fset=_set_thickness)
+
+    def _get_face_mode(self):
+        if self.position is None:
+            return self._face_mode
+        return bool(self.bot.face_mode[self.position])
+
+    def _set_face_mode(self, value):
+        if self.position is None:
+            self._face_mode = value
+        else:
+            self.bot.face_mode[self.position] = value
+
+    face_mode = property(fget=_get_face_mode, fset=_set_face_mode)
 
     def __repr__(self):
         return "{}(points={}, thickness={}, mode={})".format(
-            self.index, self.thickness, self.get_face_mode()
+            self.__class__.__name__, repr(self.index.tolist()), self.thickness, self.get_face_mode()
         )
 
     def get_face_mode(self):
@@ -64,37 +145,84 @@ class PlateFace(Face):
 
     def has_same_data(self, other):
         return self.thickness == other.thickness and \
-            self.index == other.index and \
+            np.array_equal(self.index, other.index) and \
             self.face_mode == other.face_mode
 
 
 class BOT(Primitive):
+    """
+    The BOT data is held in contiguous numpy arrays:
+    * vertices: float64 array of shape (N, 3);
+    * faces: int32 array of shape (M, 3), holding vertex indexes;
+    * thickness: float64 array of shape (M,), only used in plate modes;
+    * face_mode: bool array of shape (M,), only used in plate modes.
+    The arrays are views on over-allocated buffers, so adding vertices and faces
+    one by one is amortized O(1). Face objects are only created on demand
+    by the face/iter_faces methods, as views on these arrays.
+    """
+
+    PLATE_MODES = (3, 4)
 
-    def __init__(self, name, mode=1, orientation=1, flags=0, vertices=None, faces=None, copy=False):
+    def __init__(self, name, mode=1, orientation=1, flags=0, vertices=None, faces=None,
+                 thickness=None, face_mode=None, copy=False):
         Primitive.__init__(self, name=name)
         self.mode = mode
         self.orientation = orientation
         self.flags = flags
         if vertices is None:
             vertices = []
-        elif not isinstance(vertices, list):
-            vertices = list(vertices)
-        for i in range(0, len(vertices)):
-            vertices[i] = Vector(vertices[i], copy=copy)
-        self.vertices = vertices
+        self._vertices = np.ascontiguousarray(np.array(vertices, dtype=np.float64, copy=copy).reshape(-1, 3))
+        self._vertex_count = len(self._vertices)
+        # spatial hash used by vertex_index, built on first use and then maintained incrementally
+        self._vertex_lookup = None
+        self._faces = np.empty((0, 3), dtype=np.int32)
+        self._thickness = np.empty(0, dtype=np.float64)
+        self._face_mode = np.empty(0, dtype=np.bool_)
+        self._face_count = 0
         if faces is None:
-            faces = []
-        elif not isinstance(faces, list):
-            curves = list(faces)
-        self.faces = faces
-        for i in xrange(0, len(faces)):
-                self.add_face(faces[i])
+            return
+        if not isinstance(faces, np.ndarray):
+            faces = list(faces)
+        if len(faces) and isinstance(faces[0], Face):
+            for face in faces:
+                self.add_face(face)
+        else:
+            self.add_faces(faces, thickness=thickness, face_mode=face_mode, copy=copy)
 
     def __repr__(self):
         return "{}(mode={}, orientation={}, flags={}, vertices={}, faces={}".format(
-            self.__class__.__name__, self.getOrientation(), self.getMode(), self.flags, repr(self.vertices), repr(self.faces)
+            self.__class__.__name__, self.getMode(), self.getOrientation(), self.flags,
+            repr(self.vertices), repr(self.faces)
         )
 
+    @property
+    def vertices(self):
+        """
+        The vertices of the BOT as float64 array of shape (N, 3).
+        """
+        return self._vertices[:self._vertex_count]
+
+    @property
+    def faces(self):
+        """
+        The faces of the BOT as int32 array of shape (M, 3) of vertex indexes.
+        """
+        return self._faces[:self._face_count]
+
+    @property
+    def thickness(self):
+        """
+        The per face thickness as float64 array of shape (M,).
+        """
+        return self._thickness[:self._face_count]
+
+    @property
+    def face_mode(self):
+        """
+        The per face mode as bool array of shape (M,).
+        """
+        return self._face_mode[:self._face_count]
+
     def getMode(self):
         if self.mode == 1:
             return "Surface"
@@ -113,98 +241,186 @@ class BOT(Primitive):
         else:
             return "Clockwise"
 
+    def face(self, position):
+        """
+        Returns a Face (or PlateFace in plate modes) view on the face at <position>.
+        """
+        if position < 0:
+            position += self._face_count
+        if not 0 <= position < self._face_count:
+            raise IndexError("Invalid face position: {}".format(position))
+        if self.mode in BOT.PLATE_MODES:
+            return PlateFace(self, position=position)
+        return Face(self, position=position)
+
+    def iter_faces(self):
+        for i in xrange(0, self._face_count):
+            yield self.face(i)
+
     def add_face(self, face):
         if self.mode == 1 or self.mode == 2:
-            if isinstance(face,Face):
-                 self.faces.append(face)
-            else:
+            if not isinstance(face, Face):
                 raise BRLCADException("Invalid face type")
-        elif self.mode == 3 or self.mode == 4:
-            if isinstance(face,PlateFace):
-                 self.faces.append(face)
-            else:
+        elif self.mode in BOT.PLATE_MODES:
+            if not isinstance(face, PlateFace):
                 raise BRLCADException("Invalid face type")
         else:
             raise BRLCADException("Invalid mode")
+        if face.bot is self:
+            index = face.index
+        else:
+            index = [self.vertex_index(face.bot.vertices[i]) for i in face.index]
+        if isinstance(face, PlateFace):
+            thickness, face_mode = face.thickness, face.face_mode
+        else:
+            thickness, face_mode = None, None
+        position = self._face_count
+        self.add_faces([index], thickness=thickness, face_mode=face_mode)
+        if face.bot is self and face.position is None:
+            face._attach(position)
+
+    def add_faces(self, faces, thickness=None, face_mode=None, copy=True):
+        """
+        Appends all the given faces in one go. <faces> is anything convertible to
+        an int32 array of shape (M, 3) holding vertex indexes. <thickness> and
+        <face_mode> can be either a single value for all faces or a sequence of M values,
+        they default to 1 and True, the same as for PlateFace.
+        If the BOT has no faces yet and <copy> is False, the given arrays are used
+        as storage directly whenever they already have the right type.
+        """
+        faces = np.asarray(faces, dtype=np.int32).reshape(-1, 3)
+        count = len(faces)
+        if count and (faces.min() < 0 or faces.max() >= self._vertex_count):
+            raise ValueError("Invalid vertex index in faces, the BOT has {} vertices".format(self._vertex_count))
+        thickness = 1 if thickness is None else thickness
+        face_mode = True if face_mode is None else face_mode
+        start = self._face_count
+        end = start + count
+        if not copy and start == 0:
+            self._faces = faces
+            self._thickness = _column(thickness, np.float64, count)
+            self._face_mode = _column(face_mode, np.bool_, count)
+        else:
+            self._faces = _reserve(self._faces, end)
+            self._thickness = _reserve(self._thickness, end)
+            self._face_mode = _reserve(self._face_mode, end)
+            self._faces[start:end] = faces
+            self._thickness[start:end] = thickness
+            self._face_mode[start:end] = face_mode
+        self._face_count = end
 
     def data_validation(self):
-        if len(self.faces):
+        if self._face_count:
             return True
         else:
             return False
 
+    def add_vertex(self, value):
+        """
+        Appends the vertex without checking for duplicates and returns it's index.
+        """
+        index = self._vertex_count
+        self._vertices = _reserve(self._vertices, index + 1)
+        self._vertices[index] = value
+        self._vertex_count = index + 1
+        if self._vertex_lookup is not None:
+            self._vertex_lookup.add(self._vertices, index)
+        return index
+
+    def invalidate_vertex_index(self):
+        """
+        Must be called after changing vertices in place, as the spatial hash used by
+        vertex_index has no way to know about it.
+        """
+        self._vertex_lookup = None
+
     def vertex_index(self, value, copy=False):
-        vertex_count = len(self.vertices)
+        """
+        Returns the index of the first vertex which is the same as <value> (see Vector.is_same),
+        appending <value> as a new vertex if there's none. This is amortized O(1) as the
+        lookup goes through a spatial hash of the vertices.
+        """
+        vertex_count = self._vertex_count
         if isinstance(value, numbers.Integral):
             if value > vertex_count - 1:
                 raise ValueError("Invalid vertex index: {}".format(value))
             return value
-        value = Vector(value, copy=copy)
+        value = np.asarray(Vector(value, copy=False))
         if len(value) != 3:
             raise ValueError("A traingle needs 3D vertexes, but got: {}".format(value))
-        for i in xrange(0, vertex_count):
-            if self.vertices[i].is_same(value):
-                return i
-        self.vertices.append(value)
-        return vertex_count
+        if self._vertex_lookup is None:
+            self._vertex_lookup = PointIndex()
+            self._vertex_lookup.rebuild(self.vertices)
+        index = self._vertex_lookup.lookup(self._vertices, value)
+        if index is not None:
+            return index
+        return self.add_vertex(value)
 
     def copy(self):
         return BOT(self.name, mode=self.mode, orientation=self.orientation, flags=self.flags,
-                           vertices=self.vertices, faces=self.faces, copy=True)
-
-    def has_same_data(self, other):
-        return self.mode == other.mode and \
-            all([self.faces[i].has_same_data(other.faces[i])for i in range(max(len(self.faces), len(other.faces)))])and\
-            self.flags == other.flags and \
-            self.orientation == other.orientation and \
-            np.allclose(self.vertices,other.vertices)
+                   vertices=self.vertices, faces=self.faces, thickness=self.thickness,
+                   face_mode=self.face_mode, copy=True)
+
+    def canonical_order(self, tol=None):
+        """
+        Returns (vertex_permutation, face_permutation, faces) describing the canonical form of this BOT,
+        independent of the order of it's vertices and faces (see vmath.canonical_mesh).
+        """
+        return canonical_mesh(self.vertices, self.faces, tol=tol)
+
+    def canonical_copy(self, tol=None):
+        """
+        Returns a copy of this BOT with the vertices and faces in canonical order.
+        """
+        vertex_permutation, face_permutation, faces = self.canonical_order(tol=tol)
+        return BOT(self.name, mode=self.mode, orientation=self.orientation, flags=self.flags,
+                   vertices=self.vertices[vertex_permutation], faces=faces,
+                   thickness=self.thickness[face_permutation], face_mode=self.face_mode[face_permutation])
+
+    def has_same_data(self, other, ignore_order=False, tol=1.e-8):
+        """
+        With <ignore_order> the BOTs are compared in their canonical form, so the same
+        mesh stored with the vertices/faces in different order compares equal too.
+        The vertices are sorted after quantizing them to <tol> (see vmath.quantize), so that
+        vertices differing only by noise within tolerance (the default is the absolute
+        tolerance of Vector.is_same) get sorted the same way.
+        """
+        if self.mode != other.mode or self.flags != other.flags or self.orientation != other.orientation:
+            return False
+        if ignore_order:
+            return self.canonical_copy(tol=tol).has_same_data(other.canonical_copy(tol=tol))
+        if not np.array_equal(self.faces, other.faces):
+            return False
+        if self.mode in BOT.PLATE_MODES:
+            if not np.allclose(self.thickness, other.thickness) or \
+                    not np.array_equal(self.face_mode, other.face_mode):
+                return False
+        return self.vertices.shape == other.vertices.shape and np.allclose(self.vertices, other.vertices)
 
     def update_params(self, params):
-        thickness = []
-        faces = []
-        face_mode = []
-        for i in range(len(self.faces)):
-            faces.append(self.faces[i].index)
-            if self.mode == 3:
-                for i in range(len(self.faces)):
-                    thickness.append(self.faces[i].thickness)
-                    face_mode.append(self.faces[i].face_mode)
+        is_plate = self.mode in BOT.PLATE_MODES
         params.update({
             "mode": self.mode,
             "orientation": self.orientation,
             "flags": self.flags,
             "vertices": self.vertices,
-            "faces": faces,
-            "thickness": thickness,
-            "face_mode": face_mode
+            "faces": self.faces,
+            "thickness": self.thickness if is_plate else None,
+            "face_mode": self.face_mode if is_plate else None,
         })
 
     @staticmethod
     def from_wdb(name, data):
-        vertices = []
-        for i in range(data.num_vertices):
-            vp1 = data.vertices[i*3+0]
-            vp2 = data.vertices[i*3+1]
-            vp3 = data.vertices[i*3+2]
-            vertex = [vp1,vp2,vp3]
-            vertices.append(vertex)
-        faces = []
-        for i in range(data.num_faces):
-            fv1 = data.faces[i*3+0]
-            fv2 = data.faces[i*3+1]
-            fv3 = data.faces[i*3+2]
-            face = [int(fv1), int(fv2), int(fv3)]
-            faces.append(face)
-        bot = BOT(name,mode=data.mode,orientation=data.orientation,flags=data.bot_flags,vertices=vertices)
-        if data.mode == 3:
-            for i in range(data.num_faces):
-                bot.add_face(PlateFace(bot=bot, vertices=[vertices[x] for x in faces[i]], thickness=data.thickness[i],
-                                       face_mode=cta.bit_test(data.face_mode, i)))
-        else:
-            for i in range(data.num_faces):
-                bot.add_face(Face(bot=bot, vertices=[vertices[x] for x in faces[i]]))
-
-        return bot
+        # the BOT arrays are views over the rt_bot_internal memory, no data is copied:
+        vertices = cta.ndarray_from_pointer(data.vertices, (data.num_vertices, 3), owner=data)
+        faces = cta.ndarray_from_pointer(data.faces, (data.num_faces, 3), owner=data)
+        thickness = None
+        face_mode = None
+        if data.mode in BOT.PLATE_MODES:
+            thickness = cta.ndarray_from_pointer(data.thickness, (data.num_faces,), owner=data)
+            face_mode = cta.bool_array_from_bitv(data.face_mode, data.num_faces)
+        return BOT(name, mode=data.mode, orientation=data.orientation, flags=data.bot_flags,
+                   vertices=vertices, faces=faces, thickness=thickness, face_mode=face_mode)
 
 
 def BOT_SURFACE(name, orientation=1, flags=0, vertices=None, faces=None, copy=False):
@@ -213,8 +429,6 @@ def BOT_SURFACE(name, orientation=1, flags=0, vertices=None, faces=None, copy=Fa
 def BOT_SOLID(name, orientation=1, flags=0, vertices=None, faces=None, copy=False):
     return BOT(name=name, mode=2, orientation=orientation, flags=flags, vertices=vertices, faces=faces, copy=copy)
 
-def BOT_PLATES(name, orientation=1, flags=0, vertices=None, faces=None, copy=False):
-    return BOT(name=name, mode=3, orientation=orientation, flags=flags, vertices=vertices, faces=faces, copy=copy)
-
-
-
+def BOT_PLATES(name, orientation=1, flags=0, vertices=None, faces=None, thickness=None, face_mode=None, copy=False):
+    return BOT(name=name, mode=3, orientation=orientation, flags=flags, vertices=vertices, faces=faces,
+               thickness=thickness, face_mode=face_mode, copy=copy)
@@ -96,7 +96,7 @@ class LeafNode(TreeNode):
         if isinstance(arg, librt.union_tree):
             result.name = str(arg.tr_l.tl_name)
             if arg.tr_l.tl_mat:
-                result.matrix = cta.transform_from_pointer(arg.tr_l.tl_mat)
+                result.matrix = cta.transform_from_pointer(arg.tr_l.tl_mat, owner=arg)
         else:
             result.name = LeafNode.extract_name(arg)
             if not result.name:
@@ -105,7 +105,7 @@ class LeafNode(TreeNode):
         return result
 
     def __repr__(self):
-        if self.matrix:
+        if self.matrix is not None:
             return "{0}({1})".format(self.name, self.matrix)
         else:
             return self.name
@@ -120,7 +120,7 @@ class LeafNode(TreeNode):
             return None
 
     def copy(self):
-        return LeafNode((self.name, list(self.matrix) if self.matrix else None))
+        return LeafNode((self.name, list(self.matrix) if self.matrix is not None else None))
 
     def is_same(self, other):
         if not isinstance(other, LeafNode) or self.name != other.name:
@@ -54,5 +54,5 @@ class EBM(Primitive):
             x_dim=data.xdim,
             y_dim=data.ydim,
             tallness=data.tallness,
-            mat=cta.transform_from_pointer(data.mat)
+            mat=cta.transform_from_pointer(data.mat, owner=data)
         )
\ No newline at end of file
@@ -82,6 +82,9 @@ class Sphere(Ellipsoid):
             copy=copy
         )
 
+    def copy(self):
+        return Sphere(self.name, self.center, self.radius, copy=True)
+
     def __repr__(self):
         return "SPH(name={0}, center={1}, radius={2})".format(
             self.name, repr(self.center), self.radius
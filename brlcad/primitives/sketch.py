@@ -5,7 +5,7 @@ import collections
 import numbers
 
 from base import Primitive
-from brlcad.vmath import Vector
+from brlcad.vmath import Vector, PointIndex
 import brlcad._bindings.librt as librt
 import brlcad.ctypes_adaptors as cta
 import numpy as np
@@ -360,7 +360,7 @@ class Bezier(Curve):
         return True
 
     def copy_to(self, sketch):
-        Bezier(sketch, self._points, reverse=self.reverse, copy=True)
+        return Bezier(sketch, self._points, reverse=self.reverse, copy=True)
 
 
 class Sketch(Primitive, collections.MutableSequence):
@@ -372,25 +372,36 @@ class Sketch(Primitive, collections.MutableSequence):
         self.v_vec = Vector(v_vec, copy=copy)
         if vertices is None:
             vertices = []
-        elif not isinstance(vertices, list):
+        elif copy or not isinstance(vertices, list):
             vertices = list(vertices)
         for i in range(0, len(vertices)):
             vertices[i] = Vector(vertices[i], copy=copy)
         self.vertices = vertices
-        if curves is None:
-            curves = []
-        elif not isinstance(curves, list):
-            curves = list(curves)
-        self.curves = curves
-        for i in xrange(0, len(curves)):
-            self.add_curve_segment(curves[i], segment_index=i, copy=copy)
+        # spatial hash used by vertex_index, built on first use and then kept in sync with the vertices
+        self._vertex_lookup = None
+        self.curves = []
+        if curves is not None:
+            for curve in curves:
+                self.add_curve_segment(curve)
 
     def __repr__(self):
         return "{}({}, base={}, u_vec={}, v_vec={} curves={})".format(
             self.__class__.__name__, self.name, repr(self.base), repr(self.u_vec), repr(self.v_vec), repr(self.curves)
         )
 
+    def invalidate_vertex_index(self):
+        """
+        Must be called after replacing vertices in place, as the spatial hash used by
+        vertex_index only tracks vertices being appended or removed.
+        """
+        self._vertex_lookup = None
+
     def vertex_index(self, value, copy=False):
+        """
+        Returns the index of the first vertex which is the same as <value> (see Vector.is_same),
+        appending <value> as a new vertex if there's none. This is amortized O(1) as the
+        lookup goes through a spatial hash of the vertices.
+        """
         vertex_count = len(self.vertices)
         if isinstance(value, numbers.Integral):
             if value > vertex_count - 1:
@@ -399,10 +410,14 @@ class Sketch(Primitive, collections.MutableSequence):
         value = Vector(value, copy=copy)
         if len(value) != 2:
             raise ValueError("Sketches need 2D vertexes, but got: {}".format(value))
-        for i in xrange(0, vertex_count):
-            if self.vertices[i].is_same(value):
-                return i
+        if self._vertex_lookup is None:
+            self._vertex_lookup = PointIndex()
+        self._vertex_lookup.sync(self.vertices)
+        index = self._vertex_lookup.lookup(self.vertices, value)
+        if index is not None:
+            return index
         self.vertices.append(value)
+        self._vertex_lookup.add(self.vertices, vertex_count)
         return vertex_count
 
     def _parse_curve_segment(self, *args, **kwargs):
@@ -479,7 +494,8 @@ class Sketch(Primitive, collections.MutableSequence):
         })
 
     def copy(self):
-        return Sketch(self.name, self.curves, copy=True)
+        return Sketch(self.name, base=self.base, u_vec=self.u_vec, v_vec=self.v_vec,
+                      vertices=self.vertices, curves=self.curves, copy=True)
 
     def has_same_data(self, other):
         curve_count = len(self.curves)
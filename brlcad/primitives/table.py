@@ -77,31 +77,45 @@ if compare_version("7.24.1") <= 0:
     MAGIC_TO_PRIMITIVE_TYPE[librt.ID_HRT] = ("HRT", Primitive, librt.RT_HRT_INTERNAL_MAGIC, librt.struct_rt_hrt_internal)
 
 
-def create_primitive(type_id, db_internal, directory):
-    # TODO: research if this method won't cause a memory leak
-    # because python will not free the structures received here
-    name = str(directory.d_namep)
+# type id -> decoder function, see get_decoder:
+_DECODERS = {}
+
+
+def get_decoder(type_id):
+    """
+    Returns the function decoding the internals of the given type: decoder(name, db_internal) -> primitive.
+    The type information is resolved once per type, and the decoder is cached for later calls.
+    """
+    decoder = _DECODERS.get(type_id)
+    if decoder is None:
+        decoder = _DECODERS[type_id] = _create_decoder(type_id)
+    return decoder
+
+
+def _create_decoder(type_id):
     type_info = MAGIC_TO_PRIMITIVE_TYPE.get(type_id)
-    if type_info:
-        magic = type_info[2]
-        struct_type = type_info[3]
+    if not type_info:
+        return lambda name, db_internal: Primitive(name=name, primitive_type="UNKNOWN")
+    type_name, primitive_class, magic, struct_type = type_info
+
+    def decoder(name, db_internal):
         data = struct_type.from_address(db_internal.idb_ptr) if struct_type else None
         # the first int32 is always the magic:
-        data_magic = librt.cast(db_internal.idb_ptr, librt.POINTER(librt.c_uint32)).contents.value
+        data_magic = librt.c_uint32.from_address(db_internal.idb_ptr).value
         if magic:
             if magic != data_magic:
                 raise BRLCADException("Invalid magic value, expected {0} but got {1}".format(magic, data_magic))
         else:
-            if type_info[2]:
-                display_type_info = list(type_info)
-                display_type_info[2] = hex(display_type_info[2])
-            else:
-                display_type_info = type_info
-            warnings.warn("No magic for type: {0}, {1}, {2}".format(type_id, hex(data_magic), display_type_info))
-        if type_info[1] == Primitive:
-            return Primitive(name=name, primitive_type=type_info[0], data=data)
+            warnings.warn("No magic for type: {0}, {1}, {2}".format(type_id, hex(data_magic), type_info))
+        if primitive_class == Primitive:
+            return Primitive(name=name, primitive_type=type_name, data=data)
         else:
-            return type_info[1].from_wdb(name=name, data=data)
-    else:
-        return Primitive(name=name, primitive_type="UNKNOWN")
+            return primitive_class.from_wdb(name=name, data=data)
+
+    return decoder
 
+
+def create_primitive(type_id, db_internal, directory):
+    # the structures referenced by the returned primitive belong to <db_internal>,
+    # which must be freed by the caller when not used anymore (see WDB.lookup_handle)
+    return get_decoder(type_id)(str(directory.d_namep), db_internal)
@@ -68,5 +68,5 @@ class VOL(Primitive):
             low_thresh=data.lo,
             high_thresh=data.hi,
             cell_size=data.cellsize,
-            mat=cta.transform_from_pointer(data.mat)
+            mat=cta.transform_from_pointer(data.mat, owner=data)
         )
\ No newline at end of file
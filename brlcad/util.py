@@ -2,6 +2,7 @@
 Various functions which can be used in all other modules.
 """
 
+from collections import OrderedDict
 from distutils.version import StrictVersion
 from brlcad._bindings import BRLCAD_VERSION
 
@@ -33,3 +34,59 @@ def compare_version(version):
     # returns 0 if the versions are equal
     else:
         return 0
+
+
+class LRUCache(object):
+    """
+    Bounded mapping which evicts the least recently used entries, counting the hits and misses of get().
+    >>> cache = LRUCache(2)
+    >>> cache.put("a", 1)
+    >>> cache.put("b", 2)
+    >>> cache.get("a")
+    1
+    >>> cache.put("c", 3)
+    >>> cache.get("b") is None
+    True
+    >>> sorted(cache.keys()), cache.hits, cache.misses
+    (['a', 'c'], 1, 1)
+    """
+
+    def __init__(self, max_size):
+        if max_size < 1:
+            raise ValueError("Invalid cache size: {}".format(max_size))
+        self.max_size = max_size
+        self.hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()
+
+    def get(self, key, default=None):
+        try:
+            value = self._entries.pop(key)
+        except KeyError:
+            self.misses += 1
+            return default
+        # re-inserting marks it as the most recently used:
+        self._entries[key] = value
+        self.hits += 1
+        return value
+
+    def put(self, key, value):
+        self._entries.pop(key, None)
+        self._entries[key] = value
+        if len(self._entries) > self.max_size:
+            self._entries.popitem(last=False)
+
+    def pop(self, key, default=None):
+        return self._entries.pop(key, default)
+
+    def clear(self):
+        self._entries.clear()
+
+    def keys(self):
+        return self._entries.keys()
+
+    def __len__(self):
+        return len(self._entries)
+
+    def __contains__(self, key):
+        return key in self._entries
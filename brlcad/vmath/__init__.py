@@ -5,10 +5,17 @@ are needed for the higher level operations implemented in python.
 """
 
 from plane import Plane
+from plane_set import PlaneSet
 from segment import Segment
 from transform import Transform
 from vector import Vector
+from vector_array import VectorArray
 from triangle import Triangle
-from arc import Arc
+from arc import Arc, tessellate_arcs
+from point_index import PointIndex, weld_vertices
+from canonical import quantize, lexsort_rows, canonical_faces, canonical_mesh, canonical_key
 
-__all__ = ["Vector", "Segment", "Plane", "Transform", "Arc", "Triangle"]
+__all__ = [
+    "Vector", "VectorArray", "Segment", "Plane", "PlaneSet", "Transform", "Arc", "tessellate_arcs", "Triangle",
+    "PointIndex", "weld_vertices", "quantize", "lexsort_rows", "canonical_faces", "canonical_mesh", "canonical_key",
+]
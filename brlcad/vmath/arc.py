@@ -2,8 +2,9 @@
 Math related to geometry features of circular arcs.
 """
 import math
+import numpy as np
 from brlcad.vmath import Vector, Triangle
-from brlcad.vmath.geometry_object import GeometryObject, create_property
+from brlcad.vmath.geometry_object import GeometryObject, GeometryArray, create_property
 
 
 class Arc(GeometryObject):
@@ -39,6 +40,86 @@ class Arc(GeometryObject):
         """
         GeometryObject.__init__(self, verify=verify, **kwargs)
 
+    @classmethod
+    def from_arrays(cls, start_point, end_point, plane_normal, origin=None, angle=None, radius=None,
+                    reflex_angle=False):
+        """
+        Creates many arcs at once from arrays of parameters, one row per arc.
+        Besides the <start_point>, <end_point> and <plane_normal>, each arc is defined by
+        either it's <origin>, it's <angle>, or it's <radius> together with the <reflex_angle>
+        flag. Single values (e.g. the same plane normal for all arcs) are used for all rows.
+        All derived parameters (origin, angle, radius, tangents, length...) are calculated
+        in one vectorized pass, and a GeometryArray is returned, which will create the Arc
+        objects on access.
+        >>> arcs = Arc.from_arrays([[1, 0, 0], [2, 0, 0]], [[0, 1, 0], [-2, 0, 0]], (0, 0, 1), radius=[1, 2])
+        >>> np.allclose(arcs["angle"], [math.pi / 2, math.pi])
+        True
+        >>> arcs[1].origin.is_same([0, 0, 0])
+        True
+        """
+        start_point = np.array(start_point, dtype=np.float64, ndmin=2)
+        shape = start_point.shape
+        count = shape[0]
+        end_point = np.broadcast_to(np.asarray(end_point, dtype=np.float64), shape)
+        plane_normal = np.array(np.broadcast_to(np.asarray(plane_normal, dtype=np.float64), shape))
+        plane_normal /= np.sqrt(np.einsum("ij,ij->i", plane_normal, plane_normal))[:, np.newaxis]
+        secant = end_point - start_point
+        length = np.sqrt(np.einsum("ij,ij->i", secant, secant))
+        mid_point = start_point + 0.5 * secant
+        with np.errstate(divide="ignore", invalid="ignore"):
+            secant_unit = secant / length[:, np.newaxis]
+        arc_height_unit = np.cross(secant_unit, plane_normal)
+        if origin is not None:
+            init_params = ("start_point", "end_point", "origin", "plane_normal")
+            origin = np.broadcast_to(np.asarray(origin, dtype=np.float64), shape)
+            start_radius = start_point - origin
+            end_radius = end_point - origin
+            radius = np.sqrt(np.einsum("ij,ij->i", start_radius, start_radius))
+            start_tangent = np.cross(plane_normal, start_radius)
+            angle = np.arctan2(
+                np.einsum("ij,ij->i", end_radius, start_tangent), np.einsum("ij,ij->i", end_radius, start_radius)
+            ) % (2 * math.pi)
+        else:
+            init_params = ("start_point", "end_point", "angle", "plane_normal")
+            if angle is not None:
+                angle = np.broadcast_to(np.asarray(angle, dtype=np.float64), (count,))
+                radius = 0.5 * length / np.sin(0.5 * angle)
+            elif radius is not None:
+                radius = np.broadcast_to(np.asarray(radius, dtype=np.float64), (count,))
+                angle = 2 * np.arcsin(np.minimum(1, 0.5 * length / radius))
+                angle = np.where(reflex_angle, 2 * math.pi - angle, angle)
+            else:
+                raise ValueError("Arcs need one of: <origin>, <angle> or <radius>")
+            origin = mid_point - (radius * np.cos(0.5 * angle))[:, np.newaxis] * arc_height_unit
+            start_radius = start_point - origin
+            end_radius = end_point - origin
+            start_tangent = np.cross(plane_normal, start_radius)
+        height = radius * (1 - np.cos(0.5 * angle))
+        columns = {
+            "start_point": start_point,
+            "end_point": end_point,
+            "plane_normal": plane_normal,
+            "origin": origin,
+            "angle": angle,
+            "radius": radius,
+            "diameter": 2 * radius,
+            "reflex_angle": np.abs(angle) > math.pi,
+            "start_radius": start_radius,
+            "start_tangent": start_tangent,
+            "end_radius": end_radius,
+            "end_tangent": np.cross(plane_normal, end_radius),
+            "secant": secant,
+            "length": length,
+            "mid_point": mid_point,
+            "height": height,
+            "apex": origin + radius[:, np.newaxis] * arc_height_unit,
+        }
+        if np.all(length > 0):
+            columns["secant_unit"] = secant_unit
+            columns["arc_height_unit"] = arc_height_unit
+            columns["arc_height"] = height[:, np.newaxis] * arc_height_unit
+        return GeometryArray.from_columns(cls, columns, init_params)
+
     # Property declarations/calculation functions
 
     start_point = create_property(
@@ -190,7 +271,8 @@ class Arc(GeometryObject):
             if angle is not None:
                 cos_angle = math.cos(angle)
                 sin_angle = math.sin(angle)
-        if (sin_angle, cos_angle, start_radius, start_tangent).count(None) == 0:
+        if (sin_angle is not None and cos_angle is not None and
+                start_radius is not None and start_tangent is not None):
             return origin + cos_angle * start_radius + sin_angle * start_tangent
         return None
 
@@ -355,7 +437,7 @@ class Arc(GeometryObject):
             reflex_angle = self.reflex_angle
             length = self.length
             radius = self.radius
-            if (reflex_angle, length, radius).count(None) == 0:
+            if reflex_angle is not None and length is not None and radius is not None:
                 sin_angle = min(1, 0.5 * length / radius)
                 angle = math.asin(sin_angle)
                 if reflex_angle:
@@ -366,7 +448,7 @@ class Arc(GeometryObject):
         if start_point is None or end_point is None:
             return None
         if self.is_set("arc_point"):
-            arc_point = self._props["arc_point"]
+            arc_point = self.get_param("arc_point")
         else:
             arc_point = self.apex
         if arc_point is not None:
@@ -398,12 +480,12 @@ class Arc(GeometryObject):
     def _calculate_plane_normal(self):
         if self.is_set("arc_point"):
             # this is not available as a property:
-            arc_point = self._props["arc_point"]
+            arc_point = self.get_param("arc_point")
         else:
             arc_point = self.apex
         start_point = self.start_point
         end_point = self.end_point
-        if (arc_point, start_point, end_point).count(None) == 0:
+        if arc_point is not None and start_point is not None and end_point is not None:
             start_vector = start_point - arc_point
             end_vector = end_point - arc_point
             plane_normal = end_vector.cross(start_vector)
@@ -465,7 +547,7 @@ class Arc(GeometryObject):
         height = self.height
         radius = self.radius
         mid_point = self.mid_point
-        if (arc_height_unit, height, radius, mid_point).count(None) == 0:
+        if arc_height_unit is not None and height is not None and radius is not None and mid_point is not None:
             return mid_point + (height - radius) * arc_height_unit
         return None
 
@@ -527,7 +609,7 @@ class Arc(GeometryObject):
             radius = self.radius
             height_unit = self.arc_height_unit
             origin = self.origin
-            if (radius, height_unit, origin).count(None) == 0:
+            if radius is not None and height_unit is not None and origin is not None:
                 return origin + radius * height_unit
         mid_point = self.mid_point
         arc_height = self.arc_height
@@ -559,6 +641,22 @@ class Arc(GeometryObject):
             "This is the length of the <origin> -> <mid_point> vector."
     )
 
+    # Sampling the arc
+
+    def tessellate(self, chord_tol=None, max_angle=math.pi / 18):
+        """
+        Returns an (N, 3) array of points along the arc, from <start_point> to <end_point>,
+        evenly spaced so that each chord deviates at most <chord_tol> from the arc,
+        and spans at most <max_angle> radians (either limit can be None).
+        >>> arc = Arc(start_point="1, 0, 0", end_point="-1, 0, 0", angle=math.pi, plane_normal="0, 0, 1")
+        >>> points = arc.tessellate(max_angle=math.pi / 2)
+        >>> np.allclose(points, [[1, 0, 0], [0, 1, 0], [-1, 0, 0]])
+        True
+        >>> len(arc.tessellate(chord_tol=0.01, max_angle=None))
+        13
+        """
+        return tessellate_arcs([self], chord_tol=chord_tol, max_angle=max_angle)[0]
+
     # Utility methods for calculating arc related geometry elements without creating an Arc object
 
     @staticmethod
@@ -600,3 +698,54 @@ class Arc(GeometryObject):
         """
         inscribed_angle = Triangle.angle_from_points(start_point, arc_point, end_point)
         return 2.0 * (math.pi - inscribed_angle)
+
+
+def _segment_counts(radius, angle, chord_tol=None, max_angle=None):
+    """
+    The number of chords needed for each arc to respect the tolerances (at least 1).
+    The sagitta of a chord spanning <step> radians is: radius * (1 - cos(step / 2))
+    """
+    angle = np.abs(angle)
+    counts = np.ones(len(angle))
+    if max_angle is not None:
+        counts = np.maximum(counts, np.ceil(angle / max_angle))
+    if chord_tol is not None:
+        ratio = np.clip(1 - chord_tol / np.maximum(radius, chord_tol), -1, 1)
+        with np.errstate(divide="ignore", invalid="ignore"):
+            step = 2 * np.arccos(ratio)
+            counts = np.maximum(counts, np.where(step > 0, np.ceil(angle / step), 1))
+    return counts.astype(np.intp)
+
+
+def tessellate_arcs(arcs, chord_tol=None, max_angle=math.pi / 18):
+    """
+    Tessellates many arcs at once, as Arc.tessellate does for one arc.
+    Returns (points, offsets), where <points> is the concatenation of the
+    tessellated arcs and the points of the i-th arc are: points[offsets[i]:offsets[i + 1]]
+    >>> arc = Arc(start_point="1, 0, 0", end_point="0, 1, 0", origin="0, 0, 0", plane_normal="0, 0, 1")
+    >>> points, offsets = tessellate_arcs([arc, arc], max_angle=math.pi / 4)
+    >>> points.shape, offsets.tolist()
+    ((6, 3), [0, 3, 6])
+    """
+    if not len(arcs):
+        return np.empty((0, 3)), np.zeros(1, dtype=np.intp)
+    origins = np.array([arc.origin for arc in arcs], dtype=np.float64)
+    start_radii = np.array([arc.start_radius for arc in arcs], dtype=np.float64)
+    start_tangents = np.array([arc.start_tangent for arc in arcs], dtype=np.float64)
+    angles = np.array([arc.angle for arc in arcs], dtype=np.float64)
+    radii = np.sqrt(np.einsum("ij,ij->i", start_radii, start_radii))
+    counts = _segment_counts(radii, angles, chord_tol=chord_tol, max_angle=max_angle)
+    # each arc gets count + 1 points, the parameter for point j of arc i being: j * angle[i] / count[i]
+    sizes = counts + 1
+    offsets = np.zeros(len(arcs) + 1, dtype=np.intp)
+    np.cumsum(sizes, out=offsets[1:])
+    arc_index = np.repeat(np.arange(len(arcs)), sizes)
+    local_index = np.arange(offsets[-1]) - offsets[arc_index]
+    t = local_index * (angles / counts)[arc_index]
+    points = origins[arc_index]
+    points += np.cos(t)[:, np.newaxis] * start_radii[arc_index]
+    points += np.sin(t)[:, np.newaxis] * start_tangents[arc_index]
+    # the end points are set exactly, so that the polylines of connected arcs join exactly
+    points[offsets[:-1]] = [arc.start_point for arc in arcs]
+    points[offsets[1:] - 1] = [arc.end_point for arc in arcs]
+    return points, offsets
@@ -0,0 +1,117 @@
+"""
+Canonical ordering of vector sets, used to compare/hash geometry independent of the order of it's elements.
+"""
+import numpy as np
+
+
+def quantize(values, tol):
+    """
+    Snaps the values to a grid of <tol> sized cells, returning the integer cell coordinates.
+    Values closer than <tol> usually get the same coordinates, but values close to a cell
+    border can still end up in neighboring cells.
+    If the cell coordinates don't fit in 64 bit integers, they are returned as rounded floats,
+    which sort and compare the same way:
+    >>> quantize([0.1, 0.29, -0.31], 0.2).tolist()
+    [0, 1, -2]
+    >>> quantize([1e12, -1e12], 1e-8).tolist()
+    [1e+20, -1e+20]
+    """
+    cells = np.round(np.asarray(values, dtype=np.float64) / tol)
+    if cells.size and not np.abs(cells).max() < 2 ** 62:
+        # -0.0 and 0.0 should be the same cell:
+        return cells + 0.0
+    return cells.astype(np.int64)
+
+
+def lexsort_rows(values, tol=None):
+    """
+    Returns the permutation which sorts the rows of <values> (an (N, D) array)
+    lexicographically: by the first column, then by the second one for equal first
+    values and so on, the same order as sorting Vectors with Vector.compare_for_sort.
+    If <tol> is given, the values are quantized first (see quantize), so that values
+    which are the same within tolerance compare equal, and the order of such rows is kept.
+    >>> lexsort_rows([[1, 2, 3], [0, 5, 5], [1, 1, 9]]).tolist()
+    [1, 2, 0]
+    >>> lexsort_rows([[1, 2.0001], [1, 2], [0, 7]], tol=0.01).tolist()
+    [2, 0, 1]
+    """
+    values = np.asarray(values, dtype=np.float64)
+    if values.ndim == 1:
+        values = values.reshape(-1, 1)
+    if tol is not None:
+        values = quantize(values, tol)
+    # np.lexsort uses the last key as primary one, and it is stable:
+    return np.lexsort(values.T[::-1])
+
+
+def canonical_faces(faces):
+    """
+    Brings the faces of a mesh (an (M, K) array of vertex indexes) to a canonical form:
+    each face is rotated to start with it's smallest vertex index (keeping the orientation),
+    and then the faces are sorted.
+    Returns (rotated_faces, permutation), where the canonical faces are rotated_faces[permutation],
+    and permutation can be used to reorder other per-face data (e.g. BOT thickness).
+    >>> faces, permutation = canonical_faces([[5, 1, 2], [0, 3, 1], [2, 5, 1]])
+    >>> faces[permutation].tolist()
+    [[0, 3, 1], [1, 2, 5], [1, 2, 5]]
+    >>> permutation.tolist()
+    [1, 0, 2]
+    """
+    faces = np.asarray(faces)
+    if not len(faces):
+        return faces.copy(), np.empty(0, dtype=np.intp)
+    width = faces.shape[1]
+    shift = faces.argmin(axis=1)
+    columns = (np.arange(width) + shift[:, np.newaxis]) % width
+    rotated = faces[np.arange(len(faces))[:, np.newaxis], columns]
+    return rotated, lexsort_rows(rotated)
+
+
+def canonical_mesh(vertices, faces, tol=None):
+    """
+    Canonical form of a mesh: the vertexes are sorted (see lexsort_rows), the faces
+    renumbered accordingly and brought to canonical form (see canonical_faces).
+    Returns (vertex_permutation, face_permutation, new_faces), the canonical mesh being:
+    vertices[vertex_permutation], new_faces, with the per-face data reordered by face_permutation.
+    Note that duplicate vertexes are not merged (see weld_vertices for that).
+    >>> vertex_permutation, face_permutation, new_faces = canonical_mesh(
+    ...     [[1, 0, 0], [0, 0, 0], [0, 1, 0]], [[0, 2, 1]]
+    ... )
+    >>> vertex_permutation.tolist(), new_faces.tolist()
+    ([1, 2, 0], [[0, 2, 1]])
+    """
+    vertex_permutation = lexsort_rows(vertices, tol=tol)
+    inverse = np.empty_like(vertex_permutation)
+    inverse[vertex_permutation] = np.arange(len(vertex_permutation))
+    faces = np.asarray(faces)
+    rotated, face_permutation = canonical_faces(inverse[faces] if len(faces) else faces)
+    return vertex_permutation, face_permutation, rotated[face_permutation]
+
+
+def canonical_key(values, tol=None):
+    """
+    Returns a string key of the set of rows in <values>, independent of their order,
+    which can be used for hashing or for fast equality checks.
+    With <tol> given, rows which are the same within tolerance usually get the same key,
+    but values close to the quantization cell borders can still give different keys.
+    >>> canonical_key([[1, 2], [3, 4]]) == canonical_key([[3, 4], [1, 2]])
+    True
+    >>> canonical_key([[1, 2], [3, 4]], tol=0.01) == canonical_key([[3, 4.001], [1, 2]], tol=0.01)
+    True
+    """
+    values = np.asarray(values, dtype=np.float64)
+    if values.ndim == 1:
+        values = values.reshape(-1, 1)
+    if tol is not None:
+        values = quantize(values, tol)
+    else:
+        # -0.0 and 0.0 should give the same key:
+        values = values + 0.0
+    values = values[lexsort_rows(values)]
+    return "{0}:{1}".format(values.shape, np.ascontiguousarray(values).tostring())
+
+
+if __name__ == "__main__":
+    import doctest
+    np.set_printoptions(suppress=True, precision=5)
+    doctest.testmod()
@@ -34,6 +34,33 @@ ParameterStatus.Calculated = Calculated
 ParameterStatus.states = {Initialized, Calculating, Calculated}
 
 
+def _slot_name(param_name):
+    return "_{}".format(param_name)
+
+
+# Maps id(<geometry object>) -> list of calculated parameters, for the objects
+# currently recording their calculation plan (see GeometryObject.resolve)
+_plan_recorders = dict()
+
+
+class GeometryType(type):
+    """
+    Meta-class of the geometry classes, generating the storage layout of each
+    class from it's param_wrappers: the parameter values are stored in slots
+    (no per instance dictionaries), and each parameter gets a bit in the
+    parameter status bitfields of the instances.
+    """
+
+    def __new__(mcs, name, bases, namespace):
+        param_wrappers = namespace.get("param_wrappers")
+        if param_wrappers is not None and "__slots__" not in namespace:
+            param_names = sorted(param_wrappers.keys())
+            namespace["__slots__"] = tuple(_slot_name(x) for x in param_names)
+            namespace["param_bits"] = dict((x, 1 << i) for i, x in enumerate(param_names))
+            namespace["_plans"] = dict()
+        return type.__new__(mcs, name, bases, namespace)
+
+
 def create_property(name, context, param_wrapper, calc_func=None, doc=None):
     """
     Creates calculated properties of a geometry class.
@@ -69,24 +96,35 @@ def create_property(name, context, param_wrapper, calc_func=None, doc=None):
         if not doc:
             doc = getattr(calc_func, "__doc__", None)
 
+    slot = _slot_name(name)
+
     def getter(self):
-        if self._param_status.get(name) is Calculating:
+        try:
+            return getattr(self, slot)
+        except AttributeError:
+            pass
+        bit = self.param_bits[name]
+        if self._calculating & bit:
             return None
-        value = self._props.get(name)
+        if not calc_func:
+            raise ValueError(
+                "Mandatory parameter <{}> missing for: {}".format(name, self)
+            )
+        calculating = self._calculating
+        self._calculating = calculating | bit
+        try:
+            value = calc_func(self)
+        finally:
+            self._calculating &= ~bit
         if value is None:
-            self._param_status[name] = Calculating
-            if calc_func:
-                value = calc_func(self)
-            else:
-                raise ValueError(
-                    "Mandatory parameter <{}> missing for: {}".format(name, self)
-                )
-            if value is None:
-                raise ValueError(
-                    "Not enough information to calculate <{}> for: {}".format(name, self)
-                )
-            self._props[name] = value
-            self._param_status[name] = Calculated
+            raise ValueError(
+                "Not enough information to calculate <{}> for: {}".format(name, self)
+            )
+        setattr(self, slot, value)
+        if _plan_recorders:
+            plan = _plan_recorders.get(id(self))
+            if plan is not None:
+                plan.append((name, calculating))
         return value
 
     return property(fget=getter, doc=doc)
@@ -128,6 +166,12 @@ class GeometryObject(object):
     "Calculating" during calculation and skip re-entering calculation as
     long as it is in this state.
 
+    The parameter values are stored in slots generated by the GeometryType
+    meta-class from param_wrappers, so reading an already known parameter
+    is a plain attribute access. The Initialized/Calculating status of the
+    parameters is kept in per instance bitfields, using the bits assigned
+    to each parameter in the param_bits class property.
+
     If the verify() call should check a specific set of canonical
     parameters for consistency, the canonical_init_params class property
     should be defined and initialized in subclasses:
@@ -136,6 +180,10 @@ class GeometryObject(object):
 
     """
 
+    __metaclass__ = GeometryType
+
+    __slots__ = ("_initialized", "_calculating")
+
     # Structures to be overridden by subclasses:
 
     calc_function_map = None
@@ -167,9 +215,15 @@ class GeometryObject(object):
 
     # end of structures to be overridden
 
+    param_bits = None
+    """
+    Maps parameter names to their bit in the parameter status bitfields,
+    generated by the GeometryType meta-class.
+    """
+
     def __init__(self, verify=False, **kwargs):
-        self._props = dict()
-        self._param_status = dict()
+        self._initialized = 0
+        self._calculating = 0
         self._wrap_params(kwargs)
         # verify parameter consistency
         if verify:
@@ -202,21 +256,94 @@ class GeometryObject(object):
                 )
             )
         for param_name, value in params.items():
-            self._props[param_name] = self.wrap_param(param_name, value)
-            self._param_status[param_name] = Initialized
+            value = self.wrap_param(param_name, value)
+            if value is not None:
+                setattr(self, _slot_name(param_name), value)
+                self._initialized |= self.param_bits[param_name]
+
+    def resolve(self):
+        """
+        Calculates all the parameters which can be calculated from the initialized ones,
+        and returns self.
+        The first object of a class initialized with a given set of parameters records
+        the order in which the parameters got calculated, together with the parameters
+        which were being calculated at that time (and so were not available). This plan
+        is cached at class level, and other objects initialized with the same parameters
+        follow it straight away: each parameter is calculated when all it needs is already
+        available, without exploring the alternative calculation paths again.
+        Which parameters can be calculated also depends on the values (e.g. a 0 length
+        segment has no direction), so the plan never removes parameters: the steps which
+        fail for an object, and the parameters which could not be calculated when the plan
+        was recorded, are explored for each object following the plan.
+        """
+        plan = self._plans.get(self._initialized)
+        if plan is None:
+            self._record_plan()
+            return self
+        steps, unresolved = plan
+        calculating = self._calculating
+        failed = []
+        try:
+            for name, bit, slot, calc_func, unavailable in steps:
+                if hasattr(self, slot):
+                    continue
+                self._calculating = calculating | unavailable | bit
+                try:
+                    value = calc_func(self)
+                except ValueError:
+                    value = None
+                if value is None:
+                    failed.append(name)
+                else:
+                    setattr(self, slot, value)
+        finally:
+            self._calculating = calculating
+        self._explore(failed)
+        self._explore(unresolved)
+        return self
+
+    def _explore(self, names):
+        for name in names:
+            try:
+                getattr(self, name)
+            except ValueError:
+                # can't be calculated from the available parameters
+                pass
+
+    def _record_plan(self):
+        initialized = self._initialized
+        recorder = _plan_recorders[id(self)] = []
+        try:
+            self._explore(sorted(self.calc_function_map))
+        finally:
+            del _plan_recorders[id(self)]
+        steps = tuple(
+            (name, self.param_bits[name], _slot_name(name), self.calc_function_map[name], calculating)
+            for name, calculating in recorder
+        )
+        unresolved = tuple(
+            name for name in sorted(self.calc_function_map) if not hasattr(self, _slot_name(name))
+        )
+        self._plans[initialized] = (steps, unresolved)
 
     def verify(self):
-        verified_props = [getattr(self, param_name, None) for param_name in self.canonical_init_params]
-        if verified_props.count(None) > 0:
+        """
+        Checks that the initialized parameters are consistent with each other,
+        and are enough to calculate the canonical parameters.
+        """
+        self.resolve()
+        if not all(self.is_set(param_name) for param_name in self.canonical_init_params):
             raise ValueError(
                 "Parameter set is not complete to fully define the geometry object: {}".format(self)
             )
-        crt_props = dict(self._props)
-        for param_name, crt_value in crt_props.items():
+        for param_name, bit in self.param_bits.items():
+            if not self._initialized & bit:
+                continue
             calc_func = self.calc_function_map.get(param_name)
             if calc_func is not None:
+                crt_value = self.get_param(param_name)
                 calculated_value = calc_func(self)
-                if not np.allclose(crt_value, calculated_value):
+                if calculated_value is not None and not np.allclose(crt_value, calculated_value):
                     raise ValueError(
                         "Verify failed for {}, expected: {} but got {}".format(
                             param_name, calculated_value, crt_value
@@ -224,15 +351,107 @@ class GeometryObject(object):
                     )
 
     def is_set(self, param_name):
-        if self._param_status.get(param_name) is Calculating:
+        if self._calculating & self.param_bits[param_name]:
             return False
-        return self._props.get(param_name) is not None
+        return hasattr(self, _slot_name(param_name))
+
+    def get_param(self, param_name):
+        """
+        Returns the value of the parameter if it is initialized or already calculated,
+        None otherwise (without trying to calculate it).
+        """
+        return getattr(self, _slot_name(param_name), None)
+
+    def get_params(self):
+        """
+        Returns a dictionary of the initialized and already calculated parameters.
+        """
+        result = dict()
+        for param_name in self.param_bits:
+            value = getattr(self, _slot_name(param_name), None)
+            if value is not None:
+                result[param_name] = value
+        return result
+
+    def param_status(self, param_name):
+        """
+        Returns the ParameterStatus of the parameter, or None if it is not set.
+        """
+        bit = self.param_bits[param_name]
+        if self._calculating & bit:
+            return Calculating
+        if self._initialized & bit:
+            return Initialized
+        if hasattr(self, _slot_name(param_name)):
+            return Calculated
+        return None
 
     def calculate(self, property_name):
         calc_func = self.calc_function_map.get(property_name)
         if calc_func is None:
             return None
-        return calc_func()
+        return calc_func(self)
+
+    def __repr__(self):
+        return "{}(**{})".format(self.__class__.__name__, self.get_params())
+
+
+class GeometryArray(object):
+    """
+    An array of geometry objects of the same class, as produced by the from_arrays
+    batch constructors. The parameters of all objects are stored in a numpy structured
+    array with one field per parameter (array of structs), and the geometry objects are
+    only created when individually accessed:
+
+    * geometry_array["<param_name>"] gives the column of the parameter for all objects;
+    * geometry_array[i] creates the i-th geometry object, with the <init_params> initialized
+      and all the other available parameters already calculated (NaN values mark the
+      parameters which can't be calculated for that object, they are left unset);
+    * slicing/masking gives a new GeometryArray with the selected rows.
+    """
+
+    def __init__(self, geometry_class, data, init_params):
+        self.geometry_class = geometry_class
+        self.data = data
+        self.init_params = tuple(init_params)
+
+    @classmethod
+    def from_columns(cls, geometry_class, columns, init_params):
+        """
+        Creates a GeometryArray from a dictionary of parameter name -> numpy array.
+        The arrays must have the same length, vector parameters having one row per object.
+        """
+        columns = [(name, np.asarray(value)) for name, value in sorted(columns.items())]
+        count = len(columns[0][1])
+        dtype = np.dtype([(name, value.dtype, value.shape[1:]) for name, value in columns])
+        data = np.empty(count, dtype=dtype)
+        for name, value in columns:
+            data[name] = value
+        return cls(geometry_class, data, init_params)
+
+    def __len__(self):
+        return len(self.data)
+
+    def __iter__(self):
+        for i in xrange(0, len(self.data)):
+            yield self[i]
+
+    def __getitem__(self, index):
+        if isinstance(index, basestring):
+            return self.data[index]
+        if isinstance(index, (int, long, np.integer)):
+            return self._create(self.data[index])
+        return GeometryArray(self.geometry_class, self.data[index], self.init_params)
+
+    def _create(self, row):
+        geometry_class = self.geometry_class
+        params = dict((name, np.array(row[name])) for name in row.dtype.names)
+        result = geometry_class(**dict((name, params.pop(name)) for name in self.init_params))
+        for name, value in params.items():
+            if value.dtype.kind == "f" and np.isnan(value).any():
+                continue
+            setattr(result, _slot_name(name), geometry_class.wrap_param(name, value))
+        return result
 
     def __repr__(self):
-        return "{}(**{})".format(self.__class__.__name__, self._props)
+        return "{}({}, {})".format(self.__class__.__name__, self.geometry_class.__name__, self.data)
@@ -0,0 +1,149 @@
+"""
+Batched plane math: sets of half-spaces processed in single numpy calls.
+"""
+import numpy as np
+from plane import Plane
+
+
+class PlaneSet(np.ndarray):
+    """
+    Represents K planes as a (K, 4) array, each row holding the unit normal N
+    and the distance d of a Plane (see Plane for the conventions). Each plane
+    defines the half-space of the points P with N.dot(P) <= d, so the set
+    typically describes a convex solid as the intersection of those half-spaces,
+    e.g. the faces of an ARBN or ARB8.
+    The point tests are done for N points against all K planes with one matrix product.
+
+    Examples:
+    >>> cube = PlaneSet.from_box((0, 0, 0), (1, 1, 1))
+    >>> cube.contains_all([[0.5, 0.5, 0.5], [2, 0.5, 0.5], [1, 1, 1]]).tolist()
+    [True, False, True]
+    >>> cube[0].is_same(Plane((-1, 0, 0), 0))
+    True
+    """
+
+    __array_priority__ = 25.0
+
+    # noinspection PyNoneFunctionAssignment,PyArgumentList
+    def __new__(cls, data, copy=True):
+        """
+        Accepts a (K, 4) array, a flat sequence of 4*K floats, or a sequence of
+        Planes or 4 float sequences. The normals are normalized as for Plane.
+        >>> PlaneSet([Plane((0, 0, 2), 1), (0, 1, 0, 3)]).tolist()
+        [[0.0, 0.0, 1.0, 1.0], [0.0, 1.0, 0.0, 3.0]]
+        """
+        if isinstance(data, np.ndarray):
+            result = np.array(data, dtype=np.float64, copy=copy)
+        else:
+            result = np.array([list(x) if isinstance(x, Plane) else x for x in data], dtype=np.float64)
+        if result.ndim == 1 and result.size % 4 == 0:
+            result = result.reshape(-1, 4)
+        if result.ndim != 2 or result.shape[1] != 4:
+            raise ValueError("Expected a (K, 4) array of planes, got array of shape: {0}".format(result.shape))
+        norms = np.sqrt(np.einsum("ij,ij->i", result[:, 0:3], result[:, 0:3]))
+        if np.any(np.isclose(norms, 0)):
+            raise ValueError("Can't define a plane with 0 length normal !")
+        scale = ~np.isclose(norms, 1)
+        if scale.any():
+            if not copy and np.may_share_memory(result, data):
+                # don't change the normals in the caller's data
+                result = result.copy()
+            result[scale, 0:3] /= norms[scale, np.newaxis]
+        return result.view(cls)
+
+    def __array_wrap__(self, obj, context=None):
+        if obj.ndim == 2 and obj.shape[1] == 4:
+            return np.ndarray.__array_wrap__(self, obj, context)
+        return obj.view(np.ndarray)
+
+    def __getitem__(self, index):
+        """
+        Single rows are returned as Plane objects, other non (K, 4) results as plain numpy arrays.
+        """
+        result = np.ndarray.__getitem__(self, index)
+        if isinstance(result, np.ndarray) and (result.ndim != 2 or result.shape[1] != 4):
+            if result.shape == (4,) and isinstance(index, (int, long, np.integer)):
+                return Plane(result[0:3].copy(), result[3])
+            return result.view(np.ndarray)
+        return result
+
+    @staticmethod
+    def wrap(value):
+        return PlaneSet(value, copy=False)
+
+    @staticmethod
+    def from_box(min_point, max_point):
+        """
+        The 6 planes of an axis aligned box, with the normals pointing outwards,
+        in the order: -x, +x, -y, +y, -z, +z.
+        """
+        min_point = np.asarray(min_point, dtype=np.float64)
+        max_point = np.asarray(max_point, dtype=np.float64)
+        result = np.zeros((6, 4))
+        for i in xrange(0, 3):
+            result[2 * i, i] = -1
+            result[2 * i, 3] = -min_point[i]
+            result[2 * i + 1, i] = 1
+            result[2 * i + 1, 3] = max_point[i]
+        return PlaneSet(result, copy=False)
+
+    @property
+    def normals(self):
+        return self.view(np.ndarray)[:, 0:3]
+
+    @property
+    def distances(self):
+        return self.view(np.ndarray)[:, 3]
+
+    def to_planes(self):
+        return [Plane(row[0:3], row[3], copy=True) for row in self.view(np.ndarray)]
+
+    def signed_distance(self, points):
+        """
+        The signed distance of each point to each plane: N.dot(P) - d, which is positive
+        outside the half-space of the plane, and negative inside.
+        For an (N, 3) array of points the result is an (N, K) array, for a single point it is (K,).
+        >>> PlaneSet.from_box((0, 0, 0), (1, 1, 1)).signed_distance((0.5, 0.5, 2)).tolist()
+        [-0.5, -0.5, -0.5, -0.5, -2.0, 1.0]
+        """
+        points = np.asarray(points, dtype=np.float64)
+        result = np.dot(points, self.normals.T)
+        result -= self.distances
+        return result
+
+    def classify(self, points, tol=1.e-8):
+        """
+        Classifies the points against each plane: -1 inside the half-space, 0 on the plane
+        (within <tol> distance), 1 outside. The result has the same shape as for signed_distance.
+        >>> PlaneSet.from_box((0, 0, 0), (1, 1, 1)).classify([[0, 0.5, 2]]).tolist()
+        [[0, -1, -1, -1, -1, 1]]
+        """
+        distances = self.signed_distance(points)
+        result = np.sign(distances).astype(np.int8)
+        result[np.abs(distances) <= tol] = 0
+        return result
+
+    def contains_all(self, points, tol=1.e-8, chunk_size=65536):
+        """
+        True for each point contained by all the half-spaces (within <tol> distance),
+        meaning inside or on the surface of the convex solid bounded by the planes.
+        The points are processed in chunks of <chunk_size>, to limit the memory used.
+        """
+        points = np.asarray(points, dtype=np.float64)
+        if points.ndim == 1:
+            return bool(np.all(self.signed_distance(points) <= tol))
+        result = np.empty(len(points), dtype=bool)
+        for start in xrange(0, len(points), chunk_size):
+            chunk = points[start:start + chunk_size]
+            np.all(self.signed_distance(chunk) <= tol, axis=1, out=result[start:start + chunk_size])
+        return result
+
+    def is_same(self, other, rtol=1.e-5, atol=1.e-8):
+        other = np.asarray(other, dtype=np.float64)
+        return self.shape == other.shape and np.allclose(self, other, rtol=rtol, atol=atol)
+
+
+if __name__ == "__main__":
+    import doctest
+    np.set_printoptions(suppress=True, precision=5)
+    doctest.testmod()
@@ -0,0 +1,217 @@
+"""
+Spatial hashing of point sets, used to find/merge points which are the same within tolerance.
+"""
+import itertools
+import math
+
+import numpy as np
+
+
+class PointIndex(object):
+    """
+    Spatial hash over a growing array of points, answering "which point is the same
+    as this one" in amortized O(1), with exactly the semantics of Vector.is_same:
+
+        abs(point - value) <= atol + rtol * abs(value)
+
+    for all coordinates, in which case the lowest such point index is returned.
+
+    The point indexes are bucketed in a grid of cells, and a lookup only checks
+    the points in the cells which are within tolerance of the value. The cell size
+    follows the largest tolerance of the indexed points, so that a lookup usually
+    touches no more than 2 cells per axis. The candidates are always checked against
+    the actual coordinates, so a stale index (e.g. after changing points in place)
+    can miss a match but will never return a wrong one; call rebuild in that case.
+
+    The points themselves are not stored, they are passed in to each call, as the
+    owner of the points might need to reallocate them when growing. They can be
+    either an array of shape (N, D) or a list of D sized vectors.
+    """
+
+    def __init__(self, rtol=1.e-5, atol=1.e-8):
+        self.rtol = rtol
+        self.atol = atol
+        self._cell_size = None
+        self._cells = dict()
+        self._count = 0
+
+    def __len__(self):
+        """
+        The number of indexed points.
+        """
+        return self._count
+
+    def _tolerance(self, value):
+        return self.atol + self.rtol * np.abs(value)
+
+    def _cell(self, value):
+        return tuple(int(math.floor(x / self._cell_size)) for x in value)
+
+    def rebuild(self, points, min_cell_size=0):
+        """
+        Re-indexes all the given points, adapting the cell size to them.
+        """
+        points = np.asarray(points, dtype=np.float64)
+        self._cells = dict()
+        self._count = len(points)
+        if not len(points):
+            self._cell_size = None
+            return
+        cell_size = 2 * self._tolerance(points).max()
+        self._cell_size = max(cell_size, min_cell_size)
+        keys = np.floor(points / self._cell_size).astype(np.int64)
+        cells = self._cells
+        for i, key in enumerate(keys.tolist()):
+            key = tuple(key)
+            bucket = cells.get(key)
+            if bucket is None:
+                cells[key] = [i]
+            else:
+                bucket.append(i)
+
+    def add(self, points, index):
+        """
+        Indexes points[index], which must have been appended after the already indexed points.
+        """
+        value = points[index]
+        tolerance = self._tolerance(value).max()
+        if self._cell_size is None or tolerance > self._cell_size:
+            # the cell size at least doubles on each rebuild, so this is amortized O(1)
+            self.rebuild(points[:index + 1], min_cell_size=2 * (self._cell_size or 0))
+            return
+        key = self._cell(value)
+        bucket = self._cells.get(key)
+        if bucket is None:
+            self._cells[key] = [index]
+        else:
+            bucket.append(index)
+        self._count = index + 1
+
+    def sync(self, points):
+        """
+        Brings the index up to date with <points>: indexes the points appended since the
+        last call, or rebuilds the index if points were removed.
+        """
+        count = len(points)
+        if count < self._count:
+            self.rebuild(points)
+        for i in xrange(self._count, count):
+            self.add(points, i)
+
+    def lookup(self, points, value):
+        """
+        Returns the lowest index i for which points[i] is the same as <value> within tolerance,
+        or None if there's no such point.
+        """
+        if self._cell_size is None:
+            return None
+        value = np.asarray(value, dtype=np.float64)
+        # slightly inflated, so that rounding can't make us skip a cell; candidates are checked exactly anyway
+        tolerance = self._tolerance(value) * 1.0001
+        low = np.floor((value - tolerance) / self._cell_size).astype(np.int64)
+        high = np.floor((value + tolerance) / self._cell_size).astype(np.int64)
+        if np.prod(high - low + 1) > self._count:
+            # far too big tolerance compared to the cells, a linear scan is cheaper
+            candidates = np.arange(self._count)
+        else:
+            ranges = [xrange(low[i], high[i] + 1) for i in xrange(0, len(value))]
+            candidates = []
+            for key in itertools.product(*ranges):
+                bucket = self._cells.get(key)
+                if bucket:
+                    candidates.extend(bucket)
+            if not candidates:
+                return None
+            candidates = np.array(candidates)
+        if isinstance(points, np.ndarray):
+            candidate_points = points[candidates]
+        else:
+            candidate_points = np.array([points[i] for i in candidates], dtype=np.float64)
+        matches = np.abs(candidate_points - value) <= self._tolerance(value)
+        matches = candidates[matches.all(axis=1)]
+        if not len(matches):
+            return None
+        return int(matches.min())
+
+
+def weld_vertices(points, tol):
+    """
+    Merges the points which are closer than <tol> to each other on all axes, in one vectorized pass.
+    Returns (welded, inverse) where <welded> holds the distinct points in order of their
+    first appearance, and <inverse> maps each input point to it's index in <welded>,
+    so that welded[inverse] reproduces <points> within tolerance.
+
+    The points are snapped to a grid with cells of size <tol>: points in the same cell
+    are within tolerance and get merged, and neighboring cells are merged if any pair
+    of their points is within tolerance. As for all welding, merging is transitive,
+    so chains of close points collapse to a single one.
+    >>> welded, inverse = weld_vertices([[0, 0, 0], [1, 0, 0], [1e-9, 0, 0], [1, -1e-9, 0]], 1e-6)
+    >>> welded.tolist()
+    [[0.0, 0.0, 0.0], [1.0, 0.0, 0.0]]
+    >>> inverse.tolist()
+    [0, 1, 0, 1]
+    """
+    points = np.asarray(points, dtype=np.float64)
+    if points.ndim != 2:
+        raise ValueError("Expected an array of points, got array of shape: {}".format(points.shape))
+    if not len(points):
+        return points.copy(), np.empty(0, dtype=np.intp)
+    dimensions = points.shape[1]
+    key_type = np.dtype((np.void, 8 * dimensions))
+    keys = np.floor(points / tol).astype(np.int64)
+    cells, first, cell_inverse = np.unique(
+        np.ascontiguousarray(keys).view(key_type).ravel(), return_index=True, return_inverse=True
+    )
+    cell_keys = keys[first]
+    # the points sorted by cell, each cell being the slice cell_start[c]:cell_start[c] + cell_count[c]:
+    by_cell = np.argsort(cell_inverse, kind="mergesort")
+    cell_count = np.bincount(cell_inverse, minlength=len(cells))
+    cell_start = np.cumsum(cell_count) - cell_count
+    # connect the neighboring cells which have a pair of points within tolerance:
+    left = []
+    right = []
+    for offset in itertools.product((-1, 0, 1), repeat=dimensions):
+        if offset <= (0,) * dimensions:
+            # each pair of cells needs checking only once
+            continue
+        neighbors = np.ascontiguousarray(cell_keys + offset).view(key_type).ravel()
+        positions = np.minimum(np.searchsorted(cells, neighbors), len(cells) - 1)
+        found = np.flatnonzero(cells[positions] == neighbors)
+        if not len(found):
+            continue
+        other = positions[found]
+        # all point pairs between the cells found[k] and other[k]:
+        pair_counts = cell_count[found] * cell_count[other]
+        pair_cell = np.repeat(np.arange(len(found)), pair_counts)
+        local = np.arange(pair_counts.sum()) - np.repeat(np.cumsum(pair_counts) - pair_counts, pair_counts)
+        other_count = cell_count[other][pair_cell]
+        i = by_cell[cell_start[found][pair_cell] + local // other_count]
+        j = by_cell[cell_start[other][pair_cell] + local % other_count]
+        close = np.all(np.abs(points[i] - points[j]) <= tol, axis=1)
+        linked = np.unique(pair_cell[close])
+        left.append(found[linked])
+        right.append(other[linked])
+    left = np.concatenate(left) if left else np.empty(0, dtype=np.intp)
+    right = np.concatenate(right) if right else np.empty(0, dtype=np.intp)
+    # label propagation: each cell ends up labeled with the lowest cell index it is connected to
+    labels = np.arange(len(cells))
+    while True:
+        new_labels = labels.copy()
+        np.minimum.at(new_labels, left, labels[right])
+        np.minimum.at(new_labels, right, labels[left])
+        new_labels = new_labels[new_labels]
+        if np.array_equal(new_labels, labels):
+            break
+        labels = new_labels
+    # number the clusters in the order of their first appearance in the input:
+    clusters, cluster_first, inverse = np.unique(labels[cell_inverse], return_index=True, return_inverse=True)
+    order = np.argsort(cluster_first)
+    rank = np.empty_like(order)
+    rank[order] = np.arange(len(order))
+    return points[cluster_first[order]], rank[inverse]
+
+
+if __name__ == "__main__":
+    import doctest
+    np.set_printoptions(suppress=True, precision=5)
+    doctest.testmod()
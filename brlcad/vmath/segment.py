@@ -2,7 +2,7 @@
 Segment-based geometry.
 """
 import math
-from brlcad.vmath.geometry_object import GeometryObject, create_property
+from brlcad.vmath.geometry_object import GeometryObject, GeometryArray, create_property
 from plane import Plane
 from vector import Vector
 import numpy as np
@@ -39,6 +39,55 @@ class Segment(GeometryObject):
         """
         GeometryObject.__init__(self, verify=verify, **kwargs)
 
+    @classmethod
+    def from_arrays(cls, start_point, end_point=None, delta=None, delta_unit=None, length=None):
+        """
+        Creates many segments at once from arrays of parameters, one row per segment.
+        The same parameter combinations are accepted as for the constructor, and
+        all the other parameters are calculated in one vectorized pass.
+        Returns a GeometryArray which will create the Segment objects on access.
+        Examples:
+        >>> segments = Segment.from_arrays([[0, 0, 0], [1, 1, 1]], end_point=[[3, 4, 0], [1, 1, 3]])
+        >>> segments["length"].tolist()
+        [5.0, 2.0]
+        >>> segments[1].delta_unit.is_same([0, 0, 1])
+        True
+        >>> segments = Segment.from_arrays([[0, 0, 0], [1, 1, 1]], end_point=[[0, 0, 0], [1, 1, 3]])
+        >>> segments[0].is_set("delta_unit"), segments[1].is_set("delta_unit")
+        (False, True)
+        """
+        start_point = np.array(start_point, dtype=np.float64, ndmin=2)
+        if end_point is not None:
+            init_params = ("start_point", "end_point")
+            end_point = np.broadcast_to(np.asarray(end_point, dtype=np.float64), start_point.shape)
+            delta = end_point - start_point
+        elif delta is not None:
+            init_params = ("start_point", "delta")
+            delta = np.broadcast_to(np.asarray(delta, dtype=np.float64), start_point.shape)
+        elif delta_unit is not None and length is not None:
+            init_params = ("start_point", "delta_unit", "length")
+            length = np.asarray(length, dtype=np.float64)
+            delta = np.asarray(delta_unit, dtype=np.float64) * length[..., np.newaxis]
+            delta = np.broadcast_to(delta, start_point.shape)
+        else:
+            raise ValueError("Segments need one of: <end_point>, <delta> or <delta_unit> and <length>")
+        columns = {
+            "start_point": start_point,
+            "delta": delta,
+            "end_point": start_point + delta if end_point is None else end_point,
+            "mid_point": start_point + 0.5 * delta,
+            "length": np.sqrt(np.einsum("ij,ij->i", delta, delta)),
+        }
+        if delta_unit is not None and "delta_unit" in init_params:
+            columns["delta_unit"] = np.broadcast_to(np.asarray(delta_unit, dtype=np.float64), start_point.shape)
+        else:
+            # 0 length segments have no <delta_unit>, marked by NaN values:
+            length = columns["length"]
+            with np.errstate(invalid="ignore", divide="ignore"):
+                columns["delta_unit"] = delta / length[:, np.newaxis]
+            columns["delta_unit"][length == 0] = np.nan
+        return GeometryArray.from_columns(cls, columns, init_params)
+
     def is_same(self, other, rtol=1.e-5, atol=1.e-8):
         start_same = self.start_point.is_same(other.start_point, rtol=rtol, atol=atol)
         delta_same = self.delta.is_same(other.delta, rtol=rtol, atol=atol)
@@ -194,6 +243,38 @@ class Segment(GeometryObject):
 
         return self.start_point + (cos_angle * ap) + (cos_dot * normal) + (sin_angle * x)
 
+    def rotate_points(self, points, angles):
+        """
+        Rotates many points around this segment in one go, the same as calling
+        rotate_point for each point/angle combination.
+        <points> is a single point or an (N, 3) array, <angles> a single angle or
+        an array of angles in radians. The result has the shape of <angles> followed
+        by the shape of <points>, so an (N, 3) array of points rotated by K angles
+        gives a (K, N, 3) array.
+        Examples:
+        >>> x = Segment(start_point="1,1,1", delta="1,1,1")
+        >>> np.allclose(x.rotate_points([[1, 0, 0], [2, 2, 2]], 2 * math.pi/3), [[0, 1, 0], [2, 2, 2]])
+        True
+        >>> x.rotate_points([[1, 0, 0], [0, 1, 0]], [0, 2 * math.pi/3]).shape
+        (2, 2, 3)
+        """
+        normal = self.delta_unit.view(np.ndarray)
+        start_point = self.start_point.view(np.ndarray)
+        points = np.asarray(points, dtype=np.float64)
+        angles = np.asarray(angles, dtype=np.float64)
+        angles = angles.reshape(angles.shape + (1,) * points.ndim)
+        sin_angles = np.sin(angles)
+        cos_angles = np.cos(angles)
+        ap = points - start_point
+        x = np.cross(normal, ap)
+        cos_dot = np.dot(ap, normal)[..., np.newaxis] * (1 - cos_angles)
+        result = start_point + cos_angles * ap + cos_dot * normal + sin_angles * x
+        # get the exact same points for angles 2n*PI, as rotate_point does
+        unchanged = np.isclose(sin_angles, 0) & np.isclose(cos_angles, 1)
+        if unchanged.any():
+            result = np.where(unchanged, points, result)
+        return result
+
 
 if __name__ == "__main__":
     import doctest
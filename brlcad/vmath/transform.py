@@ -5,9 +5,10 @@ from numbers import Number
 
 import numpy as np
 from vector import Vector
+from vector_array import VectorArray
 
 
-class Transform(np.matrix):
+class Transform(np.ndarray):
     """
     A transformation, represented by a 4x4 matrix:
 
@@ -16,55 +17,311 @@ class Transform(np.matrix):
      z'   (R8  R9 R10  Dz)   z
      w'   (0   0   0  1/s)   w
 
+    The * operator is the matrix product, as for the numpy matrix class this
+    used to be derived from, multiplying with points or (N, 3) point arrays
+    transforms them (see apply). The unit transform is a shared read-only constant,
+    and the transforms returned by the translation/scale constructors are read-only
+    too, make a copy to change them. Read-only (frozen) transforms also cache their inverse.
     """
 
     __array_priority__ = 15.0
 
     def __new__(cls, data, copy=False, force=False):
+        """
+        Accepts anything a 4x4 array can be made of, including the "a, b, c, d; e, ..." string form:
+        >>> Transform("1, 0, 0, 5; 0, 1, 0, 0; 0, 0, 1, 0; 0, 0, 0, 1").apply([0, 0, 0]).tolist()
+        [5.0, 0.0, 0.0]
+
+        16 values are reshaped to 4x4 only when <force> is given, anything else
+        is then resized to 4x4 too:
+        >>> Transform(range(16))
+        Traceback (most recent call last):
+        ...
+        ValueError: A transform must be a 4x4 matrix, got: (16,)
+        >>> Transform(range(16), force=True)[1].tolist()
+        [4.0, 5.0, 6.0, 7.0]
+        """
         if isinstance(data, Transform) and data.dtype == np.float64:
             result = data.copy() if copy else data
         else:
-            result = np.matrix.__new__(cls, data, dtype=np.float64, copy=copy)
+            if isinstance(data, str):
+                data = [[float(x) for x in row.split(",")] for row in data.split(";")]
+            result = np.array(data, dtype=np.float64, copy=copy).view(cls)
         if result.shape != (4, 4):
-            if force:
-                result = np.resize(result,(4,4))
-            else :
+            if not force:
                 raise ValueError("A transform must be a 4x4 matrix, got: {0}".format(result.shape))
+            elif result.size == 16:
+                result = result.reshape(4, 4)
+            else:
+                result = np.resize(result, (4, 4)).view(cls)
+        return result
+
+    def __array_wrap__(self, obj, context=None):
+        """
+        Results which are not 4x4 anymore (e.g. reductions) are returned as plain numpy arrays.
+        """
+        if obj.shape == (4, 4):
+            return np.ndarray.__array_wrap__(self, obj, context)
+        return obj.view(np.ndarray)
+
+    def __getitem__(self, index):
+        """
+        Rows, columns and sub-matrices are returned as plain numpy arrays.
+        """
+        result = np.ndarray.__getitem__(self, index)
+        if isinstance(result, np.ndarray) and result.shape != (4, 4):
+            return result.view(np.ndarray)
         return result
 
     @staticmethod
     def unit():
-        return Transform("1, 0, 0, 0; 0, 1, 0, 0; 0, 0, 1, 0; 0, 0, 0, 1")
+        """
+        The identity transform, a shared read-only constant:
+        >>> Transform.unit() is Transform.unit()
+        True
+        """
+        return _UNIT
 
     @staticmethod
     def translation(dx, dy, dz):
-        result = Transform.unit()
-        result[0:3, 3] = (dx,), (dy,), (dz,)
-        return result
+        result = _identity()
+        result[0:3, 3] = dx, dy, dz
+        return result.freeze()
 
     @staticmethod
     def scale(value):
-        result = Transform.unit()
+        result = _identity()
         result[3, 3] = value
+        return result.freeze()
+
+    @staticmethod
+    def rotation(axis, angle, center=None):
+        """
+        Rotation by <angle> radians around <axis> (right hand rule), passing through <center>
+        if given, or the origin otherwise.
+        >>> Transform.rotation((0, 0, 1), np.pi / 2).apply([1, 0, 0]).is_same([0, 1, 0])
+        True
+        >>> Transform.rotation((0, 0, 1), np.pi, center=(1, 0, 0)).apply([0, 0, 0]).is_same([2, 0, 0])
+        True
+        """
+        axis = Vector(axis).assure_normal("Can't rotate around null vector !")
+        x, y, z = axis
+        c = np.cos(angle)
+        s = np.sin(angle)
+        t = 1 - c
+        result = _identity()
+        result[0:3, 0:3] = (
+            (t * x * x + c, t * x * y - s * z, t * x * z + s * y),
+            (t * x * y + s * z, t * y * y + c, t * y * z - s * x),
+            (t * x * z - s * y, t * y * z + s * x, t * z * z + c),
+        )
+        if center is not None:
+            center = np.asarray(center, dtype=np.float64)
+            result[0:3, 3] = center - np.dot(result[0:3, 0:3], center)
         return result
 
+    @staticmethod
+    def euler(x, y, z):
+        """
+        Rotation by the given angles in radians around the X, Y and Z axes, composed
+        as Rx * Ry * Rz: the same convention as bn_mat_angles from libbn (which takes degrees).
+        >>> t = Transform.euler(0.1, 0.2, 0.3)
+        >>> np.allclose(t, Transform.rotation((1, 0, 0), 0.1) * Transform.rotation((0, 1, 0), 0.2) *
+        ...     Transform.rotation((0, 0, 1), 0.3))
+        True
+        """
+        cx, sx = np.cos(x), np.sin(x)
+        cy, sy = np.cos(y), np.sin(y)
+        cz, sz = np.cos(z), np.sin(z)
+        result = _identity()
+        result[0:3, 0:3] = (
+            (cy * cz, -cy * sz, sy),
+            (sx * sy * cz + cx * sz, -sx * sy * sz + cx * cz, -sx * cy),
+            (-cx * sy * cz + sx * sz, cx * sy * sz + sx * cz, cx * cy),
+        )
+        return result
+
+    @staticmethod
+    def look_at(eye, target, up=(0, 0, 1)):
+        """
+        The viewing transform for an observer at <eye> looking towards <target>:
+        it moves <eye> to the origin, the viewing direction to -Z and <up> to the Y-Z plane
+        (towards +Y), same as gluLookAt. The inverse of it places an object at <eye>,
+        oriented towards <target>.
+        >>> t = Transform.look_at((0, 0, 10), (0, 0, 0), up=(0, 1, 0))
+        >>> t.apply([0, 0, 0]).is_same([0, 0, -10])
+        True
+        >>> t.apply_directions([1, 0, 0]).is_same([1, 0, 0])
+        True
+        """
+        eye = Vector(eye)
+        forward = Vector(target) - eye
+        forward = forward.assure_normal("Can't look at the eye position itself !")
+        side = forward.cross(up)
+        side = side.assure_normal("The up vector can't be parallel to the viewing direction !")
+        true_up = side.cross(forward)
+        result = _identity()
+        result[0, 0:3] = side
+        result[1, 0:3] = true_up
+        result[2, 0:3] = -forward
+        result[0:3, 3] = -np.dot(result[0:3, 0:3], eye)
+        return result
+
+    @staticmethod
+    def compose(*transforms):
+        """
+        The product of all the given transforms (the last one is applied first to points),
+        computed without intermediate Transform objects. Accepts transforms or arrays
+        of stacked 4x4 matrices, e.g. all the matrices along a path in a combination tree.
+        >>> t = Transform.compose(Transform.translation(1, 0, 0), Transform.scale(0.5), Transform.unit())
+        >>> t.apply([1, 1, 1]).tolist()
+        [3.0, 2.0, 2.0]
+        """
+        matrices = []
+        for value in transforms:
+            value = np.asarray(value, dtype=np.float64)
+            if value.ndim == 3:
+                matrices.extend(value)
+            else:
+                matrices.append(value.reshape(4, 4))
+        if not matrices:
+            return _identity()
+        result = np.array(matrices[0], dtype=np.float64)
+        buffer = np.empty((4, 4))
+        for matrix in matrices[1:]:
+            np.dot(result, matrix, out=buffer)
+            result, buffer = buffer, result
+        return result.view(Transform)
+
+    def freeze(self):
+        """
+        Makes this transform read-only, which allows caching it's inverse. Returns self.
+        """
+        self.flags.writeable = False
+        return self
+
+    def inverse(self):
+        """
+        The inverse transform. It is computed once and cached for read-only transforms.
+        >>> t = Transform.translation(1, 2, 3)
+        >>> t.inverse() is t.inverse()
+        True
+        >>> (t * t.inverse()).tolist() == Transform.unit().tolist()
+        True
+        """
+        if not self.flags.writeable:
+            result = getattr(self, "_inverse", None)
+            if result is None:
+                result = self._inverse = self._compute_inverse().freeze()
+            return result
+        return self._compute_inverse()
+
+    def _compute_inverse(self):
+        matrix = self.view(np.ndarray)
+        if np.all(matrix[3] == (0, 0, 0, 1)):
+            # affine transform: only the 3x3 linear part needs inverting
+            result = _identity()
+            linear = np.linalg.inv(matrix[0:3, 0:3])
+            result[0:3, 0:3] = linear
+            result[0:3, 3] = -np.dot(linear, matrix[0:3, 3])
+            return result
+        return np.linalg.inv(matrix).view(Transform)
+
+    I = property(inverse, doc="The inverse transform, as for numpy matrices.")
+
     def __mul__(self, other):
+        """
+        Matrix product with transforms and other 4x4 or (4, N) arrays, (N, 3) point arrays are
+        transformed as with apply, even for 4 points:
+        >>> (Transform.translation(1, 0, 0) * np.zeros((4, 3)))[:, 0].tolist()
+        [1.0, 1.0, 1.0, 1.0]
+        """
         if isinstance(other, Number):
             return np.multiply(self, other)
-        elif isinstance(other, np.matrix) and other.shape[0] == 4:
-            return np.matrix.__mul__(self, other)
+        elif isinstance(other, Transform) or (isinstance(other, np.ndarray) and other.shape == (4, 4)):
+            return np.dot(self, other)
+        elif isinstance(other, np.ndarray) and other.ndim == 2 and other.shape[1] == 3:
+            return self.apply(other)
+        elif isinstance(other, np.ndarray) and other.ndim == 2 and other.shape[0] == 4:
+            return np.dot(self, other)
         elif isinstance(other, (np.ndarray, list, tuple)):
-            if isinstance(other, (list, tuple)):
-                other = Vector(other)
-            should_extend = len(other) == 3
-            if should_extend:
-                other = list(other)
-                other.append(1)
-                other = Vector(other)
-            result = Vector(np.matrix.__mul__(self, other.flat).flat)
-            if should_extend:
-                result[0:3] /= result[3]
-                return result[0:3]
-            else:
-                return result
-        return Vector(np.matrix.__mul__(self, other).flat)
+            other = np.asarray(other, dtype=np.float64).ravel()
+            if len(other) == 3:
+                return self.apply(other)
+            return Vector(np.dot(self.view(np.ndarray), other))
+        return Vector(np.dot(self.view(np.ndarray), np.asarray(other, dtype=np.float64).ravel()))
+
+    def __imul__(self, other):
+        self[...] = self * other
+        return self
+
+    def __pow__(self, power):
+        return np.linalg.matrix_power(self.view(np.ndarray), power).view(Transform)
+
+    def apply(self, points, out=None):
+        """
+        Transforms an (N, 3) array of points at once, the same as multiplying
+        each point with this transform (including the division by w).
+        The result can be stored in <out>, which may also be <points> itself
+        for an in-place transformation. A single point gives a Vector result.
+        >>> t = Transform.translation(1, 2, 3)
+        >>> t.apply([[0, 0, 0], [1, 1, 1]]).tolist()
+        [[1.0, 2.0, 3.0], [2.0, 3.0, 4.0]]
+        >>> t.apply([1, 0, 0]).tolist()
+        [2.0, 2.0, 3.0]
+        >>> points = np.array([[2, 2, 2]], dtype=np.float64)
+        >>> result = Transform.scale(2).apply(points, out=points)
+        >>> points.tolist()
+        [[1.0, 1.0, 1.0]]
+        """
+        return self._apply(points, out, directions=False)
+
+    def apply_directions(self, vectors, out=None):
+        """
+        Transforms an (N, 3) array of direction vectors at once: only the
+        rotation/scaling part of the matrix applies, translation is ignored.
+        >>> t = Transform("0, -1, 0, 5; 1, 0, 0, 5; 0, 0, 1, 5; 0, 0, 0, 1")
+        >>> t.apply_directions([[1, 0, 0], [0, 0, 1]]).tolist()
+        [[0.0, 1.0, 0.0], [0.0, 0.0, 1.0]]
+        """
+        return self._apply(vectors, out, directions=True)
+
+    def _apply(self, points, out, directions):
+        points = np.asarray(points, dtype=np.float64)
+        single = points.ndim == 1
+        if single:
+            points = points.reshape(1, -1)
+        if points.ndim != 2 or points.shape[1] != 3:
+            raise ValueError("Expected an (N, 3) array, got array of shape: {0}".format(points.shape))
+        matrix = self.view(np.ndarray)
+        projective = not directions and np.any(matrix[3] != (0, 0, 0, 1))
+        if projective:
+            w = np.dot(points, matrix[3, 0:3])
+            w += matrix[3, 3]
+        # the product must not be written directly into <out>, which may be the same array as <points>
+        result = np.dot(points, matrix[0:3, 0:3].T)
+        if out is None:
+            out = result
+        else:
+            out = out.reshape(points.shape) if single else out
+            out[...] = result
+        if not directions:
+            out += matrix[0:3, 3]
+        if projective:
+            out /= w[:, np.newaxis]
+        if single:
+            return Vector(out.reshape(3), copy=False)
+        return VectorArray.wrap(out) if out is result else out
+
+
+def _identity():
+    return np.eye(4).view(Transform)
+
+
+_UNIT = _identity().freeze()
+
+
+if __name__ == "__main__":
+    import doctest
+    np.set_printoptions(suppress=True, precision=5)
+    doctest.testmod()
@@ -2,6 +2,7 @@
 Math for calculating components of a triangle.
 """
 import math
+import numpy as np
 from brlcad.vmath import Vector
 
 
@@ -39,3 +40,98 @@ class Triangle(object):
         p2 = Vector(p2, copy=False)
         p3 = Vector(p3, copy=False)
         return Triangle.angle_between_vectors(p1 - p2, p3 - p2)
+
+    # Batch methods calculating triangle geometry for whole meshes: the triangles are given
+    # by an (N, 3) array of <vertices> and an (M, 3) array of vertex indexes for the <faces>,
+    # as stored by the BOT primitive (bot.vertices, bot.faces).
+
+    @staticmethod
+    def mesh_metrics(vertices, faces, tol=1.e-10):
+        """
+        Calculates in one vectorized pass for each face:
+        * "normals": the (M, 3) unit normals, following the vertex order with the
+          right hand rule (all 0 for degenerate faces);
+        * "areas": the (M,) areas;
+        * "angles": the (M, 3) angles at each of the 3 vertexes, in radians
+          (NaN for the angles next to zero length edges);
+        * "aspect_ratios": the (M,) ratios between the longest edge and the
+          height on it, scaled so that an equilateral triangle has 1 (inf for degenerate faces);
+        * "degenerate": the (M,) mask of faces with repeated vertex indexes or with
+          an area less than <tol> times the square of their longest edge.
+        Returns a dictionary with the above keys.
+        >>> metrics = Triangle.mesh_metrics([[0, 0, 0], [1, 0, 0], [0, 1, 0], [2, 0, 0]], [[0, 1, 2], [0, 1, 3]])
+        >>> metrics["normals"].tolist()
+        [[0.0, 0.0, 1.0], [0.0, 0.0, 0.0]]
+        >>> metrics["areas"].tolist()
+        [0.5, 0.0]
+        >>> np.degrees(metrics["angles"][0]).round(6).tolist()
+        [90.0, 45.0, 45.0]
+        >>> metrics["degenerate"].tolist()
+        [False, True]
+        """
+        vertices = np.asarray(vertices, dtype=np.float64)
+        faces = np.asarray(faces)
+        corners = vertices[faces]
+        # edges[:, i] is the edge opposite to vertex i, going from vertex i+1 to vertex i+2:
+        edges = np.roll(corners, -2, axis=1) - np.roll(corners, -1, axis=1)
+        lengths = np.sqrt(np.einsum("ijk,ijk->ij", edges, edges))
+        cross = np.cross(corners[:, 1] - corners[:, 0], corners[:, 2] - corners[:, 0])
+        double_areas = np.sqrt(np.einsum("ij,ij->i", cross, cross))
+        longest = lengths.max(axis=1)
+        degenerate = double_areas <= tol * longest * longest
+        degenerate |= faces[:, 0] == faces[:, 1]
+        degenerate |= faces[:, 1] == faces[:, 2]
+        degenerate |= faces[:, 2] == faces[:, 0]
+        normals = np.zeros_like(cross)
+        valid = ~degenerate
+        normals[valid] = cross[valid] / double_areas[valid, np.newaxis]
+        # the angle at vertex i is between the edges i+1 -> i and i+2 -> i:
+        to_previous = -np.roll(edges, -1, axis=1)
+        to_next = np.roll(edges, 1, axis=1)
+        sin_products = np.sqrt(np.einsum(
+            "ijk,ijk->ij", np.cross(to_previous, to_next), np.cross(to_previous, to_next)
+        ))
+        angles = np.arctan2(sin_products, np.einsum("ijk,ijk->ij", to_previous, to_next))
+        zero_edges = lengths == 0
+        angles[np.roll(zero_edges, 1, axis=1) | np.roll(zero_edges, -1, axis=1)] = np.nan
+        with np.errstate(divide="ignore", invalid="ignore"):
+            aspect_ratios = np.where(
+                degenerate, np.inf, math.sqrt(3) * 0.5 * longest * longest / double_areas
+            )
+        return {
+            "normals": normals,
+            "areas": 0.5 * double_areas,
+            "angles": angles,
+            "aspect_ratios": aspect_ratios,
+            "degenerate": degenerate,
+        }
+
+    @staticmethod
+    def face_normals(vertices, faces):
+        """
+        The (M, 3) unit normals of the faces, see mesh_metrics.
+        """
+        return Triangle.mesh_metrics(vertices, faces)["normals"]
+
+    @staticmethod
+    def face_areas(vertices, faces):
+        """
+        The (M,) areas of the faces.
+        """
+        corners = np.asarray(vertices, dtype=np.float64)[np.asarray(faces)]
+        cross = np.cross(corners[:, 1] - corners[:, 0], corners[:, 2] - corners[:, 0])
+        return 0.5 * np.sqrt(np.einsum("ij,ij->i", cross, cross))
+
+    @staticmethod
+    def face_angles(vertices, faces):
+        """
+        The (M, 3) angles of the faces at each vertex, see mesh_metrics.
+        """
+        return Triangle.mesh_metrics(vertices, faces)["angles"]
+
+    @staticmethod
+    def degenerate_faces(vertices, faces, tol=1.e-10):
+        """
+        The (M,) mask of degenerate faces, see mesh_metrics.
+        """
+        return Triangle.mesh_metrics(vertices, faces, tol=tol)["degenerate"]
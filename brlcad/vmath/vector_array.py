@@ -0,0 +1,180 @@
+"""
+Batched vector math: arrays of vectors processed in single numpy calls.
+"""
+import numpy as np
+from vector import Vector
+
+
+class VectorArray(np.ndarray):
+    """
+    Represents N vectors of the same dimension as an (N, D) array, typically
+    N points in 3D or 2D space. It provides the same geometry operations as Vector,
+    applied row by row in one numpy call, so that point sets don't need to be
+    processed in python loops. The results which are a single number or flag
+    per vector for Vector (norm, dot, is_same...) are arrays of shape (N,) here.
+    The other operand can be either a VectorArray of the same shape, or a single
+    vector which is then used for all rows.
+
+    Examples:
+    >>> x = VectorArray([[3, 4, 0], [0, 0, 2]])
+    >>> x.norm().tolist()
+    [5.0, 2.0]
+    >>> isinstance(x[0], Vector)
+    True
+    >>> x.cross((0, 0, 1)).tolist()
+    [[4.0, -3.0, 0.0], [0.0, 0.0, 0.0]]
+    """
+
+    __array_priority__ = 25.0
+
+    # noinspection PyNoneFunctionAssignment,PyArgumentList
+    def __new__(cls, data, copy=True):
+        """
+        Constructor to handle most array-like data: VectorArrays, numpy arrays,
+        sequences of Vectors or of tuples/lists.
+        A single vector is turned into a VectorArray with 1 row:
+        >>> VectorArray((1, 2, 3)).shape
+        (1, 3)
+        >>> VectorArray([Vector("1, 2"), Vector("3, 4")]).tolist()
+        [[1.0, 2.0], [3.0, 4.0]]
+        """
+        if isinstance(data, np.ndarray):
+            result = data.view(cls)
+            if result.dtype != np.float64:
+                result = result.astype(np.float64)
+                copy = False
+        else:
+            result = np.array(data, dtype=np.float64).view(cls)
+            copy = False
+        if result.ndim == 1:
+            result = result.reshape(1, -1)
+        if result.ndim != 2:
+            raise ValueError("Expected array of vectors, got array with {0} dimensions".format(result.ndim))
+        return result.copy() if copy else result
+
+    def __array_wrap__(self, obj, context=None):
+        """
+        Results which are not (N, D) arrays anymore (e.g. reductions) are returned as plain numpy arrays.
+        """
+        if obj.ndim == 2:
+            return np.ndarray.__array_wrap__(self, obj, context)
+        return obj.view(np.ndarray)
+
+    def __getitem__(self, index):
+        """
+        Rows are returned as Vector, other non 2 dimensional results as plain numpy arrays.
+        """
+        result = np.ndarray.__getitem__(self, index)
+        if isinstance(result, np.ndarray) and result.ndim != 2:
+            return result.view(Vector if result.ndim == 1 else np.ndarray)
+        return result
+
+    @staticmethod
+    def wrap(value):
+        return VectorArray(value, copy=False)
+
+    @staticmethod
+    def _other(other):
+        return np.asarray(other, dtype=np.float64)
+
+    def dot(self, other):
+        """
+        Row by row dot product, unlike numpy's dot which is a matrix product.
+        >>> VectorArray([[1, 2, 3], [1, 0, 0]]).dot([1, 1, 1]).tolist()
+        [6.0, 1.0]
+        """
+        return np.einsum("ij,ij->i", self.view(np.ndarray), np.broadcast_to(self._other(other), self.shape))
+
+    def norm(self):
+        return np.sqrt(self.mag())
+
+    def mag(self):
+        return self.dot(self)
+
+    def cross(self, other):
+        """
+        Row by row cross product: self x other (not commutative !).
+        For 2D vectors the result is the z component of the cross product, of shape (N,).
+        """
+        result = np.cross(self.view(np.ndarray), self._other(other))
+        return VectorArray(result, copy=False) if result.ndim == 2 else result
+
+    def is_same(self, other, rtol=1.e-5, atol=1.e-8):
+        """
+        >>> VectorArray([[1, 2, 3], [1, 0, 0]]).is_same([1, 2, 3]).tolist()
+        [True, False]
+        """
+        try:
+            return np.isclose(self.view(np.ndarray), self._other(other), rtol=rtol, atol=atol).all(axis=1)
+        except ValueError:
+            return np.zeros(len(self), dtype=bool)
+
+    def has_norm(self, norm, rtol=1.e-5, atol=1.e-8):
+        return np.isclose(norm, self.norm(), rtol=rtol, atol=atol)
+
+    def normalize(self):
+        """
+        Normalize all the vectors in place, and return self too.
+        The vectors which are all 0 will be left as they are.
+        >>> x = VectorArray([[10, 0, 0], [0, 0, 0], [0, 3, 4]])
+        >>> y = x.normalize()
+        >>> x is y
+        True
+        >>> x.tolist()
+        [[1.0, 0.0, 0.0], [0.0, 0.0, 0.0], [0.0, 0.6, 0.8]]
+        """
+        norm = self.norm()
+        scale = ~(np.isclose(norm, 0) | np.isclose(norm, 1))
+        self[scale] /= norm[scale, np.newaxis]
+        return self
+
+    def normal_copy(self):
+        return self.copy().normalize()
+
+    def is_normal_to(self, other):
+        """
+        Per row True if the vectors are perpendicular (the null vector is perpendicular to all vectors).
+        >>> VectorArray([[1, 1, 0], [1, 1, 1]]).is_normal_to([0, 0, 1]).tolist()
+        [True, False]
+        """
+        return np.isclose(self.dot(other), 0)
+
+    def is_parallel_to(self, other):
+        """
+        Per row True if the vectors are parallel (the null vector is parallel to all vectors).
+        >>> VectorArray([[1, 1, 0], [1, 1, 1]]).is_parallel_to([-2, -2, 0]).tolist()
+        [True, False]
+        """
+        cross = np.cross(self.view(np.ndarray), self._other(other))
+        close = np.isclose(cross, 0)
+        return close.all(axis=1) if close.ndim == 2 else close
+
+    def construct_normal(self):
+        """
+        Returns unit vectors perpendicular to each vector, the same as Vector.construct_normal
+        (compatible with bn_vec_ortho from libbn for 3D vectors).
+        >>> VectorArray([[1, 0, 0], [0, -1, 0]]).construct_normal().is_same([0, 0, -1]).tolist()
+        [True, True]
+        """
+        values = self.view(np.ndarray)
+        count, length = self.shape
+        rows = np.arange(count)
+        result = np.zeros(self.shape)
+        if length == 3:
+            i = np.abs(values).argmin(axis=1)
+            j = (i + 1) % length
+            k = (i + 2) % length
+            result[rows, j] = -values[rows, k]
+            result[rows, k] = values[rows, j]
+        else:
+            i = np.abs(values).argmax(axis=1)
+            j = (i + 1) % length
+            result[rows, i] = -values[rows, j]
+            result[rows, j] = values[rows, i]
+        return VectorArray(result, copy=False).normalize()
+
+
+if __name__ == "__main__":
+    import doctest
+    np.set_printoptions(suppress=True, precision=5)
+    doctest.testmod()
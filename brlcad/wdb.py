@@ -3,12 +3,15 @@ Python wrapper for libwdb adapting python types to the needed ctypes structures.
 """
 import os
 import fnmatch
+import functools
+import re
 
+import numpy as np
 import brlcad._bindings.libwdb as libwdb
-import brlcad._bindings.libbu as libbu
 from brlcad.vmath import Transform
-from brlcad.util import check_missing_params
+from brlcad.util import check_missing_params, LRUCache
 import brlcad.ctypes_adaptors as cta
+from brlcad import allocations
 from brlcad.exceptions import BRLCADException
 import brlcad.primitives.table as p_table
 import brlcad.primitives as primitives
@@ -24,10 +27,30 @@ libwdb.mk_addmember.argtypes = [
 # This map holds the primitive type -> mk_... method mapping for saving each type of primitives.
 # It is populated by the mk_wrap_primitive decoration.
 SAVE_MAP = {}
+# Same as SAVE_MAP but holding the mk_... methods themselves, used by WDB.save_many.
+WRITE_MAP = {}
+
+
+def wrap_write(mk_func):
+    """
+    Wraps the functions writing an object to the DB: the libwdb functions free the data they are passed,
+    so the BRL-CAD side allocations made while writing are handed over to BRL-CAD if allocations are tracked
+    (see allocations.handover), and the name index and lookup cache of the DB are updated for the written object.
+    """
+    @functools.wraps(mk_func)
+    def write_func(db_self, name, *args, **kwargs):
+        if allocations.is_tracking():
+            with allocations.handover():
+                mk_func(db_self, name, *args, **kwargs)
+        else:
+            mk_func(db_self, name, *args, **kwargs)
+        db_self._object_changed(name)
+    return write_func
 
 
 def mk_wrap_primitive(primitive_class):
     def wrapper_func(mk_func):
+        mk_func = wrap_write(mk_func)
         if primitive_class == primitives.Primitive:
             pass
         elif SAVE_MAP.has_key(primitive_class) and SAVE_MAP[primitive_class] != mk_func:
@@ -51,24 +74,95 @@ def mk_wrap_primitive(primitive_class):
                 else:
                     mk_func(db_self, *args, **kwargs)
             SAVE_MAP[primitive_class] = wrapped_func
+            WRITE_MAP[primitive_class] = mk_func
         return mk_func
     return wrapper_func
 
 
+def detach_primitive(shape):
+    """
+    Returns a copy of the primitive which does not reference BRL-CAD memory anymore.
+    """
+    if shape is None:
+        return None
+    if type(shape) is primitives.Primitive:
+        # no python wrapper, the data is the raw BRL-CAD structure:
+        return primitives.Primitive(name=shape.name, primitive_type=shape.primitive_type)
+    return shape.copy()
+
+
+class InternalHandle(object):
+    """
+    Holds a primitive returned by WDB.lookup_handle, together with the internal it was decoded from.
+    The internal is freed by close(), on exiting a with block or when the handle is garbage collected,
+    after which the primitive must not be used anymore, as it's data may reference the freed memory
+    (see detach_primitive): it's array views raise a BRLCADException when used after that
+    (see ctypes_adaptors.ArrayView).
+    """
+
+    def __init__(self, primitive, db_internal):
+        self.primitive = primitive
+        self.db_internal = db_internal
+
+    def is_open(self):
+        return self.db_internal is not None
+
+    def close(self):
+        if self.db_internal is not None:
+            WDB._free_internal(self.db_internal)
+            self.db_internal = None
+
+    def release(self):
+        """
+        Returns the primitive, handing the internal over to it: the internal is freed
+        when the primitive is garbage collected.
+        """
+        shape = self.primitive
+        if shape is not None:
+            # the handle doesn't reference the primitive anymore, avoiding a reference cycle:
+            self.primitive = None
+            shape.internal_handle = self
+        return shape
+
+    def __enter__(self):
+        return self.primitive
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
+        return False
+
+    def __del__(self):
+        try:
+            self.close()
+        except Exception:
+            # the modules may already be torn down at interpreter exit
+            pass
+
+
 class WDB:
     """
     Object to open or create a BRLCad data base file and read/write/modify it.
     """
 
-    def __init__(self, db_file, title=None):
+    def __init__(self, db_file, title=None, in_memory=False, lookup_cache_size=0):
+        """
+        Opens the DB file <db_file>, creating it if it doesn't exist yet, with the given <title>.
+        With in_memory=True the objects are written to an in-memory DB, loaded from <db_file>
+        if it exists, and the whole DB is written to <db_file> in one pass by flush() or on close.
+        With lookup_cache_size > 0, the primitives returned by lookup are cached (see lookup).
+        """
+        # name -> (type, flags, directory) index of the DB objects, built on first use:
+        self._index = None
+        # name -> detached primitive, the hits/misses are counted by the cache:
+        self.lookup_cache = LRUCache(lookup_cache_size) if lookup_cache_size else None
+        self.db_file = db_file
+        self.in_memory = in_memory
         try:
             self.db_fp = None
-            if os.path.isfile(db_file):
-                self.db_ip = libwdb.db_open(db_file, "r+w")
-                if self.db_ip == libwdb.DBI_NULL:
-                    raise BRLCADException("Can't open existing DB file: <{0}>".format(db_file))
-                if libwdb.db_dirbuild(self.db_ip) < 0:
-                    raise BRLCADException("Failed loading directory of DB file: <{}>".format(db_file))
+            if in_memory:
+                self._open_in_memory(db_file, title)
+            elif os.path.isfile(db_file):
+                self.db_ip = self._open_db_ip(db_file, "r+w")
                 self.db_fp = libwdb.wdb_dbopen(self.db_ip, libwdb.RT_WDB_TYPE_DB_DISK)
                 if self.db_fp == libwdb.RT_WDB_NULL:
                     raise BRLCADException("Failed read existing DB file: <{}>".format(db_file))
@@ -82,17 +176,147 @@ class WDB:
         except Exception as e:
             raise BRLCADException("Can't open DB file <{0}>: {1}".format(db_file, e))
 
-    def __iter__(self):
+    @staticmethod
+    def _open_db_ip(db_file, mode):
+        db_ip = libwdb.db_open(db_file, mode)
+        if db_ip == libwdb.DBI_NULL:
+            raise BRLCADException("Can't open existing DB file: <{0}>".format(db_file))
+        if libwdb.db_dirbuild(db_ip) < 0:
+            libwdb.db_close(db_ip)
+            raise BRLCADException("Failed loading directory of DB file: <{}>".format(db_file))
+        return db_ip
+
+    def _open_in_memory(self, db_file, title):
+        self.db_ip = libwdb.db_create_inmem()
+        if self.db_ip == libwdb.DBI_NULL:
+            raise BRLCADException("Failed creating in-memory DB")
+        self.db_fp = libwdb.wdb_dbopen(self.db_ip, libwdb.RT_WDB_TYPE_DB_INMEM)
+        if self.db_fp == libwdb.RT_WDB_NULL:
+            raise BRLCADException("Failed opening in-memory DB")
+        if os.path.isfile(db_file):
+            # load the existing objects into memory:
+            disk_ip = self._open_db_ip(db_file, "r")
+            try:
+                if libwdb.db_dump(self.db_fp, disk_ip) < 0:
+                    raise BRLCADException("Failed loading DB file: <{}>".format(db_file))
+            finally:
+                libwdb.db_close(disk_ip)
+        elif title:
+            libwdb.mk_id(self.db_fp, title)
+
+    def flush(self):
+        """
+        Writes an in-memory DB to it's file: the objects are dumped in one pass to a temporary file,
+        which then replaces the DB file, so the DB file is not touched if writing fails.
+        For disk DBs this only flushes the pending writes of BRL-CAD.
+        """
+        if not self.in_memory:
+            libwdb.db_sync(self.db_ip)
+            return
+        temp_file = "{0}.tmp".format(self.db_file)
+        if os.path.isfile(temp_file):
+            os.remove(temp_file)
+        disk_fp = libwdb.wdb_fopen(temp_file)
+        if disk_fp == libwdb.RT_WDB_NULL:
+            raise BRLCADException("Failed creating DB file: <{}>".format(temp_file))
+        try:
+            result = libwdb.db_dump(disk_fp, self.db_ip)
+        finally:
+            libwdb.wdb_close(disk_fp)
+        if result < 0:
+            os.remove(temp_file)
+            raise BRLCADException("Failed writing DB file: <{}>".format(self.db_file))
+        if os.name == "nt" and os.path.isfile(self.db_file):
+            # os.rename can't replace existing files on windows, the old file is kept until the new one is in place:
+            backup_file = "{0}.bak".format(self.db_file)
+            if os.path.isfile(backup_file):
+                os.remove(backup_file)
+            os.rename(self.db_file, backup_file)
+            try:
+                os.rename(temp_file, self.db_file)
+            except:
+                os.rename(backup_file, self.db_file)
+                raise
+            os.remove(backup_file)
+        else:
+            # on posix the rename replaces the old file atomically:
+            os.rename(temp_file, self.db_file)
+
+    def _build_index(self):
+        index = {}
         for i in xrange(0, libwdb.RT_DBNHASH):
             dp = self.db_ip.contents.dbi_Head[i]
             while dp:
                 crt_dir = dp.contents
-                yield crt_dir
+                index[str(crt_dir.d_namep)] = (crt_dir.d_minor_type, crt_dir.d_flags, crt_dir)
                 dp = crt_dir.d_forw
+        return index
 
-    def ls(self, pattern=None):
-        name_generator = (str(x.d_namep) for x in self if not(x.d_flags & libwdb.RT_DIR_HIDDEN))
-        return [x for x in name_generator if pattern is None or fnmatch.fnmatch(name=x, pat=pattern)]
+    def _get_index(self):
+        if self._index is None:
+            self._index = self._build_index()
+        return self._index
+
+    def _update_index(self, name):
+        """
+        Updates the index entry of the object <name> after it was written or deleted.
+        """
+        if self._index is None:
+            return
+        dp = libwdb.db_lookup(self.db_ip, name, libwdb.LOOKUP_QUIET)
+        if dp:
+            crt_dir = dp.contents
+            self._index[name] = (crt_dir.d_minor_type, crt_dir.d_flags, crt_dir)
+        else:
+            self._index.pop(name, None)
+
+    def _object_changed(self, name):
+        self._update_index(name)
+        if self.lookup_cache is not None:
+            self.lookup_cache.pop(name)
+
+    def refresh_index(self):
+        """
+        The name index and the lookup cache are kept up to date by the methods of this object,
+        this is only needed after the DB was changed by other means (e.g. by GED commands).
+        """
+        self._index = None
+        if self.lookup_cache is not None:
+            self.lookup_cache.clear()
+
+    def __iter__(self):
+        for entry in self._get_index().values():
+            yield entry[2]
+
+    def ls(self, pattern=None, regex=None, types=None, is_region=None, hidden=False):
+        """
+        Lists the names of the DB objects, using the cached name index. The names can be filtered by:
+        * pattern: glob pattern (see fnmatch);
+        * regex: regular expression (string or compiled), matched from the start of the names;
+        * types: collection of type ids (e.g. libwdb.ID_BOT, libwdb.ID_COMBINATION);
+        * is_region: if not None, only regions (True) or only non-regions (False) are listed;
+        * hidden: by default the hidden objects are not listed, True lists only the hidden objects,
+          None lists all objects.
+        """
+        matchers = []
+        if pattern is not None:
+            # re caches the compiled patterns:
+            matchers.append(re.compile(fnmatch.translate(pattern)).match)
+        if regex is not None:
+            matchers.append(re.compile(regex).match)
+        if types is not None:
+            types = set(types)
+        result = []
+        for name, (object_type, flags, crt_dir) in self._get_index().iteritems():
+            if hidden is not None and hidden != bool(flags & libwdb.RT_DIR_HIDDEN):
+                continue
+            if is_region is not None and is_region != bool(flags & libwdb.RT_DIR_REGION):
+                continue
+            if types is not None and object_type not in types:
+                continue
+            if all(matcher(name) for matcher in matchers):
+                result.append(name)
+        return result
 
     def _lookup_internal(self, name):
         db_internal = libwdb.rt_db_internal()
@@ -104,25 +328,135 @@ class WDB:
             libwdb.LOOKUP_QUIET,
             libwdb.byref(libwdb.rt_uniresource)
         )
-        # TODO: the "directory" structure is leaked here perhaps ?
+        # the directory entry belongs to the directory of the DB, only the internal needs to be freed:
+        if idb_type:
+            db_internal.lifetime = cta.MemoryLifetime()
+            allocations.allocated(
+                libwdb.addressof(db_internal), "rt_db_internal", release=lambda: self._free_internal(db_internal)
+            )
         return idb_type, db_internal, dpp
 
-    def lookup(self, name):
+    @staticmethod
+    def _free_internal(db_internal):
+        # the internal may be freed by it's handle and by allocations.track_allocations too:
+        if db_internal.lifetime.freed:
+            return
+        libwdb.rt_db_free_internal(libwdb.byref(db_internal))
+        allocations.released(libwdb.addressof(db_internal))
+        db_internal.lifetime.freed = True
+
+    @staticmethod
+    def _decode(decoder, db_internal, *args):
+        # the array views of the decoded primitive get the lifetime of the internal,
+        # so they raise instead of reading freed memory after the internal was freed:
+        with db_internal.lifetime:
+            return decoder(*args)
+
+    def lookup(self, name, detach=True):
+        """
+        Returns the primitive with the given name, or None if there's no such object in the DB.
+        By default the data is copied and the internal decoded by BRL-CAD is freed right away,
+        so looking up any number of objects runs in constant memory.
+        With detach=False the data of the returned primitive are views into the internal, which is
+        freed when the primitive is garbage collected: the views kept after that raise when used
+        (see lookup_handle for controlling the lifetime of the internal explicitly).
+        Primitive types without python wrapper can't be detached, they are returned as with detach=False.
+        If the lookup cache is enabled (see lookup_cache_size), the detached primitives are cached,
+        and each lookup returns a copy of the cached one, so changing the returned primitive won't
+        affect the cache.
+        """
+        if self.lookup_cache is not None and detach:
+            return self._cached_lookup(name)
+        handle = self.lookup_handle(name)
+        if detach and type(handle.primitive) is not primitives.Primitive:
+            with handle as shape:
+                return detach_primitive(shape)
+        return handle.release()
+
+    def _cached_lookup(self, name):
+        shape = self.lookup_cache.get(name)
+        if shape is None:
+            handle = self.lookup_handle(name)
+            if handle.primitive is None or type(handle.primitive) is primitives.Primitive:
+                # not in the DB, or the data can't be detached from the internal:
+                return handle.release()
+            with handle:
+                shape = detach_primitive(handle.primitive)
+            self.lookup_cache.put(name, shape)
+        return detach_primitive(shape)
+
+    def lookup_handle(self, name):
+        """
+        Returns an InternalHandle holding the primitive with the given name (None if it's not in the DB)
+        and the internal it was decoded from, which is freed when the handle is closed, e.g.:
+
+            with brl_db.lookup_handle("bot.s") as bot:
+                vertex_count = len(bot.vertices)
+        """
         idb_type, db_internal, dpp = self._lookup_internal(name)
         if not idb_type:
-            return None
-        return p_table.create_primitive(idb_type, db_internal, dpp.contents.contents)
+            return InternalHandle(None, None)
+        try:
+            shape = self._decode(p_table.create_primitive, db_internal, idb_type, db_internal, dpp.contents.contents)
+        except:
+            self._free_internal(db_internal)
+            raise
+        return InternalHandle(shape, db_internal)
+
+    def lookup_many(self, names, types=None, detach=True):
+        """
+        Generator of the primitives for <names>, which is either a glob pattern (see ls) or a sequence of names.
+        Unknown names and objects with other type than the given <types> (collection of type ids,
+        e.g. libwdb.ID_BOT) are skipped, without decoding them.
+        The directory entries are taken from the name index, and the same rt_db_internal structure is
+        reused to decode all objects with the cached decoder of their type (see table.get_decoder),
+        each internal being freed before decoding the next one.
+        With detach=False the primitives are not copied, but they are only valid until the next one
+        is produced, as their data may reference the freed internal (their array views raise when used later).
+        """
+        index = self._get_index()
+        if isinstance(names, basestring):
+            names = self.ls(names, types=types)
+        if types is not None:
+            types = set(types)
+        db_internal = libwdb.rt_db_internal()
+        db_internal_ref = libwdb.byref(db_internal)
+        resource_ref = libwdb.byref(libwdb.rt_uniresource)
+        for name in names:
+            entry = index.get(name)
+            if entry is None or (types is not None and entry[0] not in types):
+                continue
+            crt_dir = entry[2]
+            idb_type = libwdb.rt_db_get_internal(db_internal_ref, libwdb.byref(crt_dir), self.db_ip, None, resource_ref)
+            if idb_type < 0:
+                raise BRLCADException("Failed decoding object: <{}>".format(name))
+            db_internal.lifetime = cta.MemoryLifetime()
+            try:
+                shape = self._decode(p_table.get_decoder(idb_type), db_internal, name, db_internal)
+                yield detach_primitive(shape) if detach else shape
+            finally:
+                libwdb.rt_db_free_internal(db_internal_ref)
+                db_internal.lifetime.freed = True
 
     def delete(self, name):
         idb_type, db_internal, dpp = self._lookup_internal(name)
         if not idb_type:
             return False
+        self._free_internal(db_internal)
         result1 = not libwdb.db_delete(self.db_ip, dpp.contents)
         result2 = not libwdb.db_dirdelete(self.db_ip, dpp.contents)
+        self._object_changed(name)
         return result1 and result2
 
-    def close(self):
-        libwdb.wdb_close(self.db_fp)
+    def close(self, flush=True):
+        """
+        Closes the DB, an in-memory DB is written to it's file first, unless <flush> is False.
+        """
+        try:
+            if self.in_memory and flush:
+                self.flush()
+        finally:
+            libwdb.wdb_close(self.db_fp)
 
     @mk_wrap_primitive(primitives.Sphere)
     def sphere(self, name, center=(0, 0, 0), radius=1):
@@ -198,21 +532,14 @@ class WDB:
     def ars(self, name, curves):
         ncurves = len(curves)
         pts_per_curve = len(cta.flatten_numbers(curves[1]))/3
-        mod_curves  = [[None for x in range(pts_per_curve*3)] for y in range(ncurves)]
-        ## for start
-        for i in range(pts_per_curve):
-            for j in range(3):
-                mod_curves[0][3*i+j] = curves[0][j]
-        ##for other curves
-        for i in range(1,ncurves-1):
-            for j in range(3*pts_per_curve):
-                mod_curves[i][j] = curves[i][j]
-        ## for end
-        for i in range(pts_per_curve):
-            for j in range(3):
-                mod_curves[ncurves-1][3*i+j] = curves[ncurves-1][j]
-
-        libwdb.mk_ars(self.db_fp, name, ncurves, pts_per_curve, cta.array2d(mod_curves, use_brlcad_malloc=True))
+        # mk_ars frees the curves, so they are filled directly in memory allocated by BRL-CAD:
+        curves_arg, rows = cta.brlcad_array2d([pts_per_curve * 3] * ncurves, debug_msg="mk_ars")
+        # the first and last curves are single points, repeated for each point of the curve:
+        rows[0][:] = np.tile(cta.flatten_numbers(curves[0])[0:3], pts_per_curve)
+        for i in range(1, ncurves - 1):
+            rows[i][:] = cta.flatten_numbers(curves[i])
+        rows[ncurves - 1][:] = np.tile(cta.flatten_numbers(curves[ncurves - 1])[0:3], pts_per_curve)
+        libwdb.mk_ars(self.db_fp, name, ncurves, pts_per_curve, curves_arg)
 
     @mk_wrap_primitive(primitives.Superell)
     def superell(self, name, center=(0, 0, 0), a=(1, 0, 0), b=(0, 1, 0), c=(0, 0, 1), n=0, e=0):
@@ -262,8 +589,14 @@ class WDB:
     def arbn(self, name, planes=(1, 0, 0, 1, -1, 0, 0, 1, 0, 1, 0, 1, 0, -1, 0, 1, 0, 0, 1, 1, 0, 0, -1, 1)):
         # mk_arbn will free the passed array, so we need to alloc the memory in brlcad code:
         # TODO: this was fixed in the latest BRL-CAD code, need to do it conditionally on version ?
-        planes_arg = cta.brlcad_copy(cta.planes(planes), "mk_arbn")
-        libwdb.mk_arbn(self.db_fp, name, len(planes_arg)/4, planes_arg)
+        if not isinstance(planes, np.ndarray):
+            planes = cta.flatten_numbers(planes)
+        planes = np.asarray(planes, dtype=np.float64).reshape(-1)
+        if planes.size % 4 != 0:
+            raise ValueError("Invalid parameter count ({}) for planes !".format(planes.size))
+        planes_arg = cta.brlcad_ndarray((planes.size / 4, 4), debug_msg="mk_arbn")
+        planes_arg[:] = planes.reshape(-1, 4)
+        libwdb.mk_arbn(self.db_fp, name, len(planes_arg), cta.ndarray_buffer(planes_arg))
 
     @mk_wrap_primitive(primitives.Particle)
     def particle(self, name, base=(0, 0, 0), height=(0, 0, 1), r_base=0.5, r_end=0.2):
@@ -310,14 +643,16 @@ class WDB:
     @mk_wrap_primitive(primitives.BOT)
     def bot(self, name, mode=3, orientation=1, flags=0, vertices=[[0, 0, 0], [0, 0, 1], [0, 1, 0], [1, 0, 0]],
                  faces = [[0, 1, 2], [1, 2, 3], [3, 1, 0]], thickness=[2, 3, 1], face_mode=[True, True, False]):
+        # the arrays are passed to BRL-CAD without copying, mk_bot copies the data into it's own structures
+        vertices = np.asarray(vertices, dtype=np.float64).reshape(-1, 3)
+        faces = np.asarray(faces, dtype=np.int32).reshape(-1, 3)
+        thickness_arg = None
         face_mode_struct = 0
-        if mode == 3:
-            face_mode_struct=libbu.bu_bitv_new(len(faces))
-            for i in range(len(faces)):
-                if face_mode[i]:
-                    cta.bit_set(face_mode_struct, i)
-        libwdb.mk_bot(self.db_fp, name, mode, orientation, flags, len(vertices), len(faces), cta.doubles(vertices),
-                      cta.integers(faces), cta.doubles(thickness), face_mode_struct)
+        if mode in primitives.BOT.PLATE_MODES:
+            thickness_arg = cta.doubles(np.asarray(thickness, dtype=np.float64))
+            face_mode_struct = cta.bitv_from_bool_array(np.broadcast_to(face_mode, (len(faces),)))
+        libwdb.mk_bot(self.db_fp, name, mode, orientation, flags, len(vertices), len(faces),
+                      cta.doubles(vertices), cta.integers(faces), thickness_arg, face_mode_struct)
 
     @mk_wrap_primitive(primitives.Submodel)
     def submodel(self, name, file_name, treetop, method=1):
@@ -388,6 +723,10 @@ class WDB:
         if isinstance(obj_list, str):
             obj_list = [obj_list]
         idb_types, db_internals, dpp_list = zip(*[self._lookup_internal(obj) for obj in obj_list])
+        # only the directory entries are needed:
+        for idb_type, db_internal in zip(idb_types, db_internals):
+            if idb_type:
+                self._free_internal(db_internal)
         if not idb_types:
             raise ValueError("No objects to hole !")
         if any(map(lambda idb_type: idb_type != libwdb.ID_COMBINATION, idb_types)):
@@ -400,6 +739,8 @@ class WDB:
             hole_radius,
             len(dpp_list), dir_list
         )
+        # make_hole changes the combinations and adds a new RCC with a generated name:
+        self.refresh_index()
 
     def save(self, shape):
         if SAVE_MAP.has_key(shape.__class__):
@@ -407,9 +748,36 @@ class WDB:
         else:
             raise NotImplementedError("Save not implemented for type: {0}".format(type(shape)))
 
+    def save_many(self, shapes, stop_on_error=False):
+        """
+        Saves the primitives from the iterable <shapes> in the order they come in, so combinations
+        can follow their members. <shapes> can be a generator, only the shape being saved is held in memory.
+        The save methods are taken from WRITE_MAP, skipping the type checks done by save(), and the same
+        parameters dict is reused for all shapes. The arguments of each shape are still converted
+        separately, as the libwdb functions take over the memory they are passed.
+        Returns the list of (shape, exception) for the shapes which could not be saved, in input order,
+        or raises the first error if <stop_on_error> is True.
+        """
+        failures = []
+        params = {}
+        for shape in shapes:
+            try:
+                write_func = WRITE_MAP.get(shape.__class__)
+                if write_func is None:
+                    raise NotImplementedError("Save not implemented for type: {0}".format(shape.__class__))
+                params.clear()
+                shape.update_params(params)
+                write_func(self, shape.name, **params)
+            except Exception as e:
+                if stop_on_error:
+                    raise
+                failures.append((shape, e))
+        return failures
+
     def __enter__(self):
         return self
 
     def __exit__(self, exc_type, exc_val, exc_tb):
-        self.close()
+        # on errors an in-memory DB is not written, leaving the DB file as it was:
+        self.close(flush=exc_type is None)
         return False
@@ -0,0 +1,55 @@
+import unittest
+
+from brlcad import allocations
+
+
+class AllocationsTestCase(unittest.TestCase):
+
+    def test_not_tracking(self):
+        self.assertFalse(allocations.is_tracking())
+        # no tracker, nothing to do:
+        allocations.allocated(1, "test")
+        allocations.released(1)
+        with allocations.track_allocations() as tracker:
+            self.assertTrue(allocations.is_tracking())
+            # allocated before tracking, ignored:
+            allocations.released(1)
+        self.assertFalse(allocations.is_tracking())
+        self.assertEqual({}, tracker.outstanding())
+
+    def test_outstanding(self):
+        with allocations.track_allocations() as tracker:
+            allocations.allocated(1, "a", size=8)
+            allocations.allocated(2, "a", size=16)
+            allocations.allocated(3, "b")
+            with allocations.track_allocations() as inner_tracker:
+                allocations.released(2)
+        self.assertEqual({"a": (1, 8), "b": (1, 0)}, tracker.outstanding())
+        self.assertEqual({"a": 2, "b": 1}, tracker.allocation_counts)
+        self.assertEqual({"a": 1}, tracker.release_counts)
+        self.assertEqual({}, inner_tracker.outstanding())
+        self.assertIn("outstanding a: count=1, size=8", tracker.report())
+
+    def test_release(self):
+        freed = []
+        with allocations.track_allocations(release=True) as tracker:
+            allocations.allocated(1, "internal", release=lambda: freed.append(1))
+            allocations.allocated(2, "internal", release=lambda: freed.append(2))
+            allocations.allocated(3, "block")
+        self.assertEqual([1, 2], sorted(freed))
+        self.assertEqual({"block": (1, 0)}, tracker.outstanding())
+
+    def test_handover(self):
+        with allocations.track_allocations() as tracker:
+            with allocations.handover():
+                allocations.allocated(1, "mk_arbn")
+            with self.assertRaises(ValueError):
+                with allocations.handover():
+                    allocations.allocated(2, "mk_arbn")
+                    raise ValueError("failed")
+        self.assertEqual({"mk_arbn": (1, 0)}, tracker.outstanding())
+        self.assertEqual({"mk_arbn": 1}, tracker.release_counts)
+
+
+if __name__ == "__main__":
+    unittest.main()
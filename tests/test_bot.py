@@ -1,5 +1,6 @@
 import os
 import unittest
+import numpy as np
 from brlcad.primitives import bot
 import brlcad.wdb as wdb
 
@@ -51,6 +52,64 @@ class BOTTestCase(unittest.TestCase):
         result = self.brl_db.lookup(parallel_triangles.name)
         self.assertTrue(parallel_triangles.has_same_data(result))
 
+    def test_bot_arrays(self):
+        vertices = np.array([[0, 0, 0], [1, 0, 0], [0, 1, 0], [0, 0, 1]], dtype=np.float64)
+        faces = np.array([[0, 1, 2], [0, 1, 3], [0, 2, 3], [1, 2, 3]], dtype=np.int32)
+        tetra = bot.BOT_PLATES(name="tetra.s", vertices=vertices, faces=faces,
+                               thickness=[1, 2, 3, 4], face_mode=[True, False, True, False])
+        self.assertEqual((4, 3), tetra.vertices.shape)
+        self.assertEqual((4, 3), tetra.faces.shape)
+        self.assertEqual(np.int32, tetra.faces.dtype)
+        face = tetra.face(1)
+        self.assertEqual(2, face.thickness)
+        self.assertFalse(face.face_mode)
+        face.thickness = 5
+        self.assertEqual(5, tetra.thickness[1])
+
+        self.brl_db.save(tetra)
+        result = self.brl_db.lookup(tetra.name)
+        self.assertTrue(tetra.has_same_data(result))
+
+    def test_bot_added_face_is_view(self):
+        prism = bot.BOT_SOLID(name="view.s")
+        face = bot.Face(bot=prism, vertices=[[0, 0, 1], [1, 0, 0], [0, 1, 0]])
+        prism.add_face(face)
+        prism.faces[0] = [2, 1, 0]
+        self.assertEqual([2, 1, 0], face.index.tolist())
+
+    def test_bot_vertex_index(self):
+        soup = bot.BOT_SURFACE(name="soup.s")
+        for i in xrange(0, 100):
+            soup.add_face(bot.Face(bot=soup, vertices=[[i, 0, 0], [i + 1, 0, 0], [i, 1 + 1e-9, 0]]))
+        self.assertEqual(201, len(soup.vertices))
+        self.assertEqual(1, soup.vertex_index([1, 1e-9, 0]))
+
+    def test_bot_ignore_order(self):
+        vertices = np.array([[0, 0, 0], [1, 0, 0], [0, 1, 0], [0, 0, 1]], dtype=np.float64)
+        faces = np.array([[0, 1, 2], [0, 3, 1], [1, 3, 2]])
+        original = bot.BOT_PLATES(name="plates.s", vertices=vertices, faces=faces, thickness=[1, 2, 3])
+        permutation = np.array([2, 0, 3, 1])
+        inverse = np.argsort(permutation)
+        shuffled = bot.BOT_PLATES(
+            name="plates.s", vertices=vertices[permutation], faces=np.roll(inverse[faces[::-1]], 1, axis=1),
+            thickness=[3, 2, 1]
+        )
+        self.assertFalse(original.has_same_data(shuffled))
+        self.assertTrue(original.has_same_data(shuffled, ignore_order=True))
+        shuffled.thickness[0] = 5
+        self.assertFalse(original.has_same_data(shuffled, ignore_order=True))
+
+    def test_bot_ignore_order_jitter(self):
+        vertices = np.array([[0, 2, 0], [0, 1, 0], [1, 0, 0], [1, 1, 1]], dtype=np.float64)
+        faces = np.array([[0, 1, 2], [1, 3, 2]])
+        original = bot.BOT_SURFACE(name="jitter.s", vertices=vertices, faces=faces)
+        # the noise in the leading coordinate would change the exact sort order:
+        jittered = vertices.copy()
+        jittered[0:2, 0] = [-1e-12, 1e-12]
+        jittered = bot.BOT_SURFACE(name="jitter.s", vertices=jittered[::-1], faces=3 - faces)
+        self.assertTrue(original.has_same_data(jittered, ignore_order=True))
+        self.assertFalse(original.has_same_data(jittered, ignore_order=True, tol=1e-14))
+
 
 if __name__ == "__main__":
     unittest.main()
@@ -108,5 +108,26 @@ class SketchTestCase(unittest.TestCase):
         self.assertTrue(shape.is_same(result))
         self.assertTrue(sketch.is_same(result.sketch))
 
+    def test_vertex_index(self):
+        sketch = Sketch("vertex_index.s")
+        for i in xrange(0, 100):
+            sketch.add_curve_segment(sketch.line((i, 0), (i + 1, 1e-9)))
+        self.assertEqual(101, len(sketch.vertices))
+        self.assertEqual(1, sketch.vertex_index((1, 0)))
+        del sketch.vertices[-1]
+        self.assertEqual(100, sketch.vertex_index((100, 0)))
+        self.assertEqual(101, len(sketch.vertices))
+
+    def test_copy(self):
+        sketch = Sketch("copy_sketch.s", u_vec=(0, 1, 0), v_vec=(0, 0, 1))
+        sketch.add_curve_segment(sketch.line((-1, -1), (-1, 1)))
+        sketch.add_curve_segment(sketch.bezier(((-1, 1), (0, 2), (1, 1))))
+        result = sketch.copy()
+        self.assertTrue(sketch.is_same(result))
+        self.assertIsNot(sketch.vertices, result.vertices)
+        result.line((5, 5), (6, 6))
+        self.assertEqual(4, len(sketch.vertices))
+
+
 if __name__ == "__main__":
     unittest.main()
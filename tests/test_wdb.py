@@ -7,6 +7,8 @@ import brlcad._bindings.libwdb as libwdb
 import brlcad.wdb as wdb
 import brlcad.ctypes_adaptors as cta
 import brlcad.primitives as primitives
+from brlcad import allocations
+from brlcad.exceptions import BRLCADException
 
 
 class WDBTestCase(unittest.TestCase):
@@ -277,6 +279,111 @@ class WDBTestCase(unittest.TestCase):
     def test_lookup_not_existing(self):
         self.assertIsNone(self.lookup_shape("not_existing"))
 
+    def test_lookup_detach(self):
+        shape = self.brl_db.lookup("sphere.s", detach=True)
+        self.assertTrue(shape.is_same(primitives.Sphere("sphere.s", (0, 0, 0), 1)))
+        ars = self.brl_db.lookup("ars.s", detach=True)
+        self.assertIsNone(getattr(ars.curves[1], "owner", None))
+        self.assertTrue(ars.has_same_data(self.lookup_shape("ars.s")))
+        self.assertIsNone(self.brl_db.lookup("not_existing.s", detach=True))
+
+    def test_lookup_frees_internal(self):
+        with allocations.track_allocations() as tracker:
+            self.brl_db.lookup("ars.s")
+            self.assertEqual({}, tracker.outstanding())
+            # with detach=False the internal is freed when the primitive is garbage collected:
+            ars = self.brl_db.lookup("ars.s", detach=False)
+            self.assertEqual((1, 0), tracker.outstanding()["rt_db_internal"])
+            curve = ars.curves[1]
+            del ars
+            self.assertEqual({}, tracker.outstanding())
+        with self.assertRaises(BRLCADException):
+            curve.tolist()
+
+    def test_lookup_handle(self):
+        handle = self.brl_db.lookup_handle("ars.s")
+        self.assertTrue(handle.is_open())
+        with handle as ars:
+            self.assertTrue(ars.has_same_data(self.brl_db.lookup("ars.s", detach=True)))
+        self.assertFalse(handle.is_open())
+        with self.brl_db.lookup_handle("not_existing.s") as shape:
+            self.assertIsNone(shape)
+
+    def test_lookup_handle_after_close(self):
+        with self.brl_db.lookup_handle("ars.s") as ars:
+            curve = ars.curves[1]
+            expected = curve.copy()
+            doubled = curve * 2
+        # the copies stay valid, the views into the freed internal raise:
+        self.assertTrue(np.allclose(expected * 2, doubled))
+        with self.assertRaises(BRLCADException):
+            ars.curves[1][0]
+        with self.assertRaises(BRLCADException):
+            curve.tolist()
+        shapes = list(self.brl_db.lookup_many(["ars.s"], detach=False))
+        with self.assertRaises(BRLCADException):
+            shapes[0].curves[1] + 1
+
+    def test_ls_filters(self):
+        self.assertEqual(["arb4.s", "arb5.s", "arb6.s", "arb7.s", "arb8.s"], sorted(self.brl_db.ls("arb?.s")))
+        self.assertEqual(["arb4.s", "arbn.s"], sorted(self.brl_db.ls(regex=r"arb[4n]")))
+        self.assertEqual(["arbn.s"], self.brl_db.ls(types=[libwdb.ID_ARBN]))
+        self.assertEqual(["combination.c"], self.brl_db.ls(types=[libwdb.ID_COMBINATION]))
+        self.assertEqual([], self.brl_db.ls("*.c", is_region=True))
+        self.assertEqual(["_GLOBAL"], self.brl_db.ls(hidden=True))
+        self.assertIn("_GLOBAL", self.brl_db.ls(hidden=None))
+        self.assertNotIn("_GLOBAL", self.brl_db.ls())
+
+    def test_ls_index_update(self):
+        self.brl_db.sphere("index_test.s")
+        self.assertEqual(["index_test.s"], self.brl_db.ls("index_test.*"))
+        self.brl_db.delete("index_test.s")
+        self.assertEqual([], self.brl_db.ls("index_test.*"))
+
+    def test_save_many(self):
+        def generate_shapes():
+            for i in xrange(0, 5):
+                yield primitives.Sphere("save_many_{0}.s".format(i), (i, 0, 0), 1)
+                yield primitives.RPC("save_many_{0}.rpc".format(i))
+            yield primitives.Primitive("save_many_unknown.s", primitive_type="HF")
+        failures = self.brl_db.save_many(generate_shapes())
+        self.assertEqual(["save_many_unknown.s"], [shape.name for shape, error in failures])
+        self.assertIsInstance(failures[0][1], NotImplementedError)
+        names = sorted(self.brl_db.ls("save_many_*"))
+        self.assertEqual(10, len(names))
+        self.assertTrue(self.lookup_shape("save_many_3.s").center.is_same((3, 0, 0)))
+        for name in names:
+            self.brl_db.delete(name)
+
+    def test_save_many_order(self):
+        shapes = [
+            primitives.Sphere("save_order_1.s", (1, 0, 0), 1),
+            primitives.Primitive("save_order_hf1.s", primitive_type="HF"),
+            primitives.RPC("save_order_2.s"),
+            primitives.RPC("save_order_1.s"),
+            primitives.Primitive("save_order_hf2.s", primitive_type="HF"),
+            primitives.Sphere("save_order_2.s", (2, 0, 0), 1),
+        ]
+        failures = self.brl_db.save_many(shapes)
+        self.assertEqual(["save_order_hf1.s", "save_order_hf2.s"], [shape.name for shape, error in failures])
+        # the shapes are written in input order, so the last one written with a name is kept:
+        self.assertIsInstance(self.lookup_shape("save_order_1.s"), primitives.RPC)
+        self.assertTrue(self.lookup_shape("save_order_2.s").center.is_same((2, 0, 0)))
+        with self.assertRaises(NotImplementedError):
+            self.brl_db.save_many(shapes, stop_on_error=True)
+        for name in ("save_order_1.s", "save_order_2.s"):
+            self.brl_db.delete(name)
+
+    def test_lookup_many(self):
+        shapes = list(self.brl_db.lookup_many("arb?.s"))
+        self.assertEqual(["arb4.s", "arb5.s", "arb6.s", "arb7.s", "arb8.s"], sorted(x.name for x in shapes))
+        for shape in shapes:
+            self.assertTrue(shape.has_same_data(self.lookup_shape(shape.name)))
+        names = ["sphere.s", "not_existing.s", "arbn.s", "torus.s"]
+        self.assertEqual(["sphere.s", "arbn.s", "torus.s"], [x.name for x in self.brl_db.lookup_many(names)])
+        shapes = self.brl_db.lookup_many(names, types=[libwdb.ID_ARBN], detach=False)
+        self.assertEqual(["arbn.s"], [x.name for x in shapes])
+
     def test_delete_not_existing(self):
         self.assertFalse(self.brl_db.delete("not_existing"))
 
@@ -298,6 +405,70 @@ class WDBTestCase(unittest.TestCase):
         self.assertTrue(expected.is_same(test_comb))
         self.brl_db.delete(test_name)
 
+    def test_in_memory_db(self):
+        db_name = "test_in_memory.g"
+        if os.path.isfile(db_name):
+            os.remove(db_name)
+        with wdb.WDB(db_name, "in memory test", in_memory=True) as memory_db:
+            memory_db.sphere("memory.s", radius=2)
+            self.assertEqual(["memory.s"], memory_db.ls())
+            # nothing is written until flushed:
+            self.assertFalse(os.path.isfile(db_name))
+            memory_db.flush()
+            self.assertTrue(os.path.isfile(db_name))
+            memory_db.rcc("memory.rcc")
+        # the in-memory DB is written on close too, and can be loaded again:
+        with wdb.WDB(db_name, in_memory=True) as memory_db:
+            self.assertEqual(["memory.rcc", "memory.s"], sorted(memory_db.ls()))
+            self.assertEqual(2, memory_db.lookup("memory.s").radius)
+            memory_db.delete("memory.rcc")
+        with wdb.WDB(db_name) as disk_db:
+            self.assertEqual(["memory.s"], disk_db.ls())
+        os.remove(db_name)
+
+    def test_lookup_cache(self):
+        db_name = "test_lookup_cache.g"
+        if os.path.isfile(db_name):
+            os.remove(db_name)
+        with wdb.WDB(db_name, lookup_cache_size=2) as cached_db:
+            cached_db.sphere("cached.s", radius=2)
+            cached_db.rcc("cached.rcc")
+            cached_db.torus("cached.tor")
+            shape = cached_db.lookup("cached.s")
+            shape.center[0] = 5
+            # the cached primitive is not changed through the returned copy:
+            self.assertTrue(cached_db.lookup("cached.s").center.is_same((0, 0, 0)))
+            self.assertEqual((1, 1), (cached_db.lookup_cache.hits, cached_db.lookup_cache.misses))
+            # writing the object invalidates the cache:
+            cached_db.sphere("cached.s", radius=3)
+            self.assertEqual(3, cached_db.lookup("cached.s").radius)
+            self.assertEqual(2, cached_db.lookup_cache.misses)
+            # the least recently used entry is evicted:
+            cached_db.lookup("cached.rcc")
+            cached_db.lookup("cached.tor")
+            self.assertNotIn("cached.s", cached_db.lookup_cache)
+            cached_db.delete("cached.tor")
+            self.assertIsNone(cached_db.lookup("cached.tor"))
+        os.remove(db_name)
+
+    def test_lookup_cache_bypass(self):
+        db_name = "test_lookup_cache_bypass.g"
+        if os.path.isfile(db_name):
+            os.remove(db_name)
+        with wdb.WDB(db_name, lookup_cache_size=2) as cached_db:
+            # CLINE has no python wrapper, it is not cached and keeps it's data:
+            libwdb.mk_cline(cached_db.db_fp, "cached.cline", cta.point((0, 0, 0)), cta.direction((0, 0, 1)), 1, 0.5)
+            shape = cached_db.lookup("cached.cline")
+            self.assertEqual("CLINE", shape.primitive_type)
+            self.assertIsNotNone(shape.data)
+            self.assertNotIn("cached.cline", cached_db.lookup_cache)
+            # detach=False skips the cache:
+            cached_db.sphere("cached.s")
+            self.assertTrue(cached_db.lookup("cached.s", detach=False).center.is_same((0, 0, 0)))
+            self.assertNotIn("cached.s", cached_db.lookup_cache)
+            self.assertEqual((0, 1), (cached_db.lookup_cache.hits, cached_db.lookup_cache.misses))
+        os.remove(db_name)
+
     def check_empty_db(self, empty_db):
         # the _GLOBAL object should exist:
         lst = [x for x in empty_db if str(x.d_namep) == '_GLOBAL']
@@ -0,0 +1,95 @@
+import math
+import unittest
+import numpy as np
+from brlcad.vmath import Arc, tessellate_arcs
+
+
+class ArcTestCase(unittest.TestCase):
+
+    def setUp(self):
+        self.arcs = [
+            Arc(start_point="1, 0, 0", end_point="0, 1, 0", origin="0, 0, 0", plane_normal="0, 0, 1"),
+            Arc(start_point="1, 0, 0", end_point="0, 1, 0", origin="0, 0, 0", plane_normal="0, 0, -1"),
+            Arc(start_point="0, 0, 5", end_point="0, 10, 5", angle=math.pi, plane_normal="1, 0, 0"),
+            Arc(start_point="3, 0, 0", angle=2 * math.pi, origin="0, 0, 0", plane_normal="0, 1, 0"),
+        ]
+
+    def test_resolve_plan(self):
+        for arc in self.arcs:
+            params = dict((name, arc.get_param(name)) for name in arc.param_bits if arc.is_set(name))
+            first = Arc(**params).resolve().get_params()
+            self.assertIn(Arc(**params)._initialized, Arc._plans)
+            second = Arc(**params).resolve().get_params()
+            self.assertEqual(sorted(first), sorted(second))
+            for name, value in first.items():
+                self.assertTrue(np.allclose(value, second[name]), msg="Wrong value for {}".format(name))
+        # the full circle can't be verified, as it's origin can't be calculated from it's end points
+        for arc in self.arcs[:3]:
+            arc.verify()
+
+    def check_arrays(self, arcs, **init_params):
+        self.assertEqual(len(init_params["start_point"]), len(arcs))
+        for i in xrange(0, len(arcs)):
+            expected = Arc(**dict((name, value[i]) for name, value in init_params.items()))
+            actual = arcs[i]
+            self.assertIsInstance(actual, Arc)
+            for name in arcs.data.dtype.names:
+                self.assertTrue(
+                    np.allclose(getattr(expected, name), arcs[name][i]),
+                    msg="Wrong value for {}, expected: {}, found: {}".format(
+                        name, getattr(expected, name), arcs[name][i]
+                    )
+                )
+                self.assertTrue(np.allclose(getattr(expected, name), getattr(actual, name)))
+
+    def test_from_arrays(self):
+        rng = np.random.RandomState(5)
+        start_point = rng.rand(10, 3)
+        end_point = rng.rand(10, 3)
+        plane_normal = np.cross(end_point - start_point, rng.rand(10, 3))
+        plane_normal /= np.sqrt((plane_normal ** 2).sum(axis=1))[:, np.newaxis]
+        radius = np.sqrt(((end_point - start_point) ** 2).sum(axis=1)) * (0.6 + rng.rand(10))
+        reflex_angle = rng.rand(10) > 0.5
+        arcs = Arc.from_arrays(start_point, end_point, plane_normal, radius=radius, reflex_angle=reflex_angle)
+        self.assertEqual(reflex_angle.tolist(), arcs["reflex_angle"].tolist())
+        self.check_arrays(
+            arcs, start_point=start_point, end_point=end_point, plane_normal=plane_normal, angle=arcs["angle"]
+        )
+        self.check_arrays(
+            Arc.from_arrays(start_point, end_point, plane_normal, origin=arcs["origin"]),
+            start_point=start_point, end_point=end_point, plane_normal=plane_normal, origin=arcs["origin"]
+        )
+        self.check_arrays(
+            Arc.from_arrays(start_point, end_point, plane_normal, angle=arcs["angle"])[2:5],
+            start_point=start_point[2:5], end_point=end_point[2:5], plane_normal=plane_normal[2:5],
+            angle=arcs["angle"][2:5]
+        )
+
+    def check_points(self, arc, points, chord_tol):
+        self.assertTrue(arc.start_point.is_same(points[0]))
+        self.assertTrue(arc.end_point.is_same(points[-1]))
+        origin = np.asarray(arc.origin)
+        distances = np.sqrt(((points - origin) ** 2).sum(axis=1))
+        self.assertTrue(np.allclose(arc.radius, distances))
+        chords = np.sqrt(((points[1:] - points[:-1]) ** 2).sum(axis=1))
+        sagitta = arc.radius - np.sqrt(arc.radius ** 2 - (chords / 2) ** 2)
+        self.assertTrue((sagitta <= chord_tol * (1 + 1e-9)).all())
+        self.assertTrue(np.allclose(0, np.dot(points - origin, arc.plane_normal)))
+
+    def test_tessellate(self):
+        for arc in self.arcs:
+            points = arc.tessellate(chord_tol=0.01)
+            self.check_points(arc, points, chord_tol=0.01)
+        self.assertEqual(5, len(self.arcs[0].tessellate(max_angle=math.pi / 8)))
+        self.assertEqual(13, len(self.arcs[1].tessellate(max_angle=math.pi / 8)))
+
+    def test_tessellate_arcs(self):
+        points, offsets = tessellate_arcs(self.arcs, chord_tol=0.05, max_angle=None)
+        self.assertEqual(len(self.arcs) + 1, len(offsets))
+        self.assertEqual(len(points), offsets[-1])
+        for i, arc in enumerate(self.arcs):
+            expected = arc.tessellate(chord_tol=0.05, max_angle=None)
+            self.assertTrue(np.allclose(expected, points[offsets[i]:offsets[i + 1]]))
+        points, offsets = tessellate_arcs([])
+        self.assertEqual((0, 3), points.shape)
+        self.assertEqual([0], offsets.tolist())
@@ -0,0 +1,44 @@
+import unittest
+import numpy as np
+from brlcad.vmath import Vector, lexsort_rows, canonical_faces, canonical_mesh, canonical_key
+
+
+class CanonicalTestCase(unittest.TestCase):
+
+    def setUp(self):
+        rng = np.random.RandomState(9)
+        self.values = rng.randint(0, 3, (100, 3)).astype(np.float64)
+
+    def test_same_order_as_compare_for_sort(self):
+        expected = sorted(range(0, len(self.values)),
+                          cmp=lambda i, j: int(np.sign(Vector(self.values[i]).compare_for_sort(self.values[j]))) or i - j)
+        self.assertEqual(expected, lexsort_rows(self.values).tolist())
+
+    def test_tolerance(self):
+        noisy = self.values + (np.random.RandomState(10).rand(*self.values.shape) - 0.5) * 1e-6
+        self.assertEqual(lexsort_rows(self.values).tolist(), lexsort_rows(noisy, tol=1e-3).tolist())
+        self.assertEqual(canonical_key(self.values, tol=1e-3), canonical_key(noisy[::-1], tol=1e-3))
+        self.assertNotEqual(canonical_key(self.values), canonical_key(noisy))
+
+    def test_tolerance_large_values(self):
+        # the cell coordinates overflow 64 bit integers with this tolerance:
+        values = [[2e11, 0], [-2e11, 0], [1e11, 0], [1e11, -5e10]]
+        self.assertEqual([1, 3, 2, 0], lexsort_rows(values, tol=1e-8).tolist())
+        other_values = [[3e11, 0], [-3e11, 0], [1e11, 0], [1e11, -5e10]]
+        self.assertNotEqual(canonical_key(values, tol=1e-8), canonical_key(other_values, tol=1e-8))
+        self.assertEqual(canonical_key(values, tol=1e-8), canonical_key(values[::-1], tol=1e-8))
+
+    def test_canonical_mesh(self):
+        vertices = np.random.RandomState(11).rand(10, 3)
+        faces = np.array([[0, 1, 2], [2, 3, 4], [5, 6, 7], [7, 8, 9], [9, 0, 5]])
+        vertex_permutation, face_permutation, new_faces = canonical_mesh(vertices, faces)
+        new_vertices = vertices[vertex_permutation]
+        # the same triangles, with the same orientation:
+        for old_face, new_face in zip(faces[face_permutation], new_faces):
+            shift = list(old_face).index(vertex_permutation[new_face[0]])
+            self.assertTrue(np.array_equal(vertices[np.roll(old_face, -shift)], new_vertices[new_face]))
+        shuffle = np.array([3, 1, 4, 0, 2])
+        _, _, shuffled_faces = canonical_mesh(vertices, np.roll(faces[shuffle], 1, axis=1))
+        self.assertTrue(np.array_equal(new_faces, shuffled_faces))
+        rotated, permutation = canonical_faces(np.empty((0, 3), dtype=np.int32))
+        self.assertEqual(0, len(permutation))
@@ -0,0 +1,37 @@
+import unittest
+import numpy as np
+from brlcad.vmath import Plane, PlaneSet, Vector
+
+
+class PlaneSetTestCase(unittest.TestCase):
+
+    def setUp(self):
+        rng = np.random.RandomState(7)
+        self.planes = [Plane(rng.rand(3) - 0.5, rng.rand() + 0.5) for _ in xrange(0, 12)]
+        self.points = rng.rand(200, 3) * 4 - 2
+
+    def test_same_as_planes(self):
+        plane_set = PlaneSet(self.planes)
+        distances = plane_set.signed_distance(self.points)
+        self.assertEqual((len(self.points), len(self.planes)), distances.shape)
+        for j, plane in enumerate(self.planes):
+            self.assertTrue(plane_set[j].is_same(plane))
+            expected = [plane.normal.dot(point) - plane.distance for point in self.points]
+            self.assertTrue(np.allclose(expected, distances[:, j]))
+        on_plane = self.planes[0].normal * self.planes[0].distance
+        self.assertTrue(Plane.contains(self.planes[0], on_plane))
+        self.assertEqual(0, plane_set.classify(on_plane)[0])
+
+    def test_contains_all(self):
+        plane_set = PlaneSet(self.planes)
+        expected = [all(np.dot(p.normal, point) <= p.distance for p in self.planes) for point in self.points]
+        self.assertEqual(expected, plane_set.contains_all(self.points).tolist())
+        self.assertEqual(expected, plane_set.contains_all(self.points, chunk_size=7).tolist())
+        self.assertEqual(expected[0], plane_set.contains_all(Vector(self.points[0])))
+
+    def test_normalized(self):
+        data = np.array([[0, 0, 2, 1], [0, 3, 0, -1]], dtype=np.float64)
+        plane_set = PlaneSet(data, copy=False)
+        self.assertEqual([[0, 0, 1, 1], [0, 1, 0, -1]], plane_set.tolist())
+        self.assertEqual(2, data[0, 2])
+        self.assertRaises(ValueError, PlaneSet, [0, 0, 0, 1])
@@ -0,0 +1,63 @@
+import unittest
+import numpy as np
+from brlcad.vmath import Vector, PointIndex, weld_vertices
+
+
+class PointIndexTestCase(unittest.TestCase):
+
+    @staticmethod
+    def linear_index(points, value):
+        for i in xrange(0, len(points)):
+            if Vector(points[i]).is_same(value):
+                return i
+        return None
+
+    def test_lookup_same_as_linear_scan(self):
+        rng = np.random.RandomState(1)
+        base = np.round(rng.rand(100, 3) * 100, 2)
+        noise = (rng.rand(300, 3) - 0.5) * 2e-3 * rng.randint(0, 2, (300, 1))
+        values = base[rng.randint(0, 100, 300)] + noise
+        points = np.empty((len(values), 3))
+        count = 0
+        index = PointIndex()
+        for value in values:
+            expected = self.linear_index(points[:count], value)
+            actual = index.lookup(points[:count], value)
+            self.assertEqual(expected, actual, msg="Wrong lookup for: {}".format(value))
+            if actual is None:
+                points[count] = value
+                index.add(points, count)
+                count += 1
+
+    def test_lookup_2d(self):
+        points = np.array([[0, 0], [1, 1], [1, 1 + 1e-9]])
+        index = PointIndex()
+        index.rebuild(points)
+        self.assertEqual(1, index.lookup(points, [1, 1]))
+        self.assertIsNone(index.lookup(points, [1, 2]))
+
+    def test_weld_vertices(self):
+        points = np.array([[0, 0, 0], [1, 1, 1], [0, 0, 5e-7], [1, 1, 1], [2, 2, 2]])
+        welded, inverse = weld_vertices(points, 1e-6)
+        self.assertEqual([[0, 0, 0], [1, 1, 1], [2, 2, 2]], welded.tolist())
+        self.assertEqual([0, 1, 0, 1, 2], inverse.tolist())
+
+    def test_weld_vertices_across_cells(self):
+        # the points are in neighboring cells, but still within tolerance
+        points = np.array([[1 - 1e-7, 0], [1 + 1e-7, 0], [3, 0]])
+        welded, inverse = weld_vertices(points, 1e-6)
+        self.assertEqual(2, len(welded))
+        self.assertEqual([0, 0, 1], inverse.tolist())
+
+    def test_weld_vertices_cell_border(self):
+        # 0.95 and 1.0 are within tolerance across the cell border, while the first points
+        # of their cells are not; 1.9 is then close to 1.0, so the chain collapses to one point
+        points = np.array([[0.05, 0, 0], [0.95, 0, 0], [1.9, 0, 0], [1.0, 0, 0]])
+        welded, inverse = weld_vertices(points, 1.0)
+        self.assertEqual([0, 0, 0, 0], inverse.tolist())
+        welded, inverse = weld_vertices(points, 0.5)
+        self.assertEqual([0, 1, 2, 1], inverse.tolist())
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -1,5 +1,6 @@
 import unittest
 from brlcad.vmath import Segment
+from brlcad.vmath.geometry_object import Initialized, Calculated
 import numpy as np
 
 
@@ -72,6 +73,69 @@ class SegmentTestCase(unittest.TestCase):
             **{name: "some value"}
         )
 
+    def test_param_status(self):
+        segment = Segment(start_point="1, 2, 3", end_point="4, 6, 3")
+        self.assertFalse(hasattr(segment, "__dict__"))
+        self.assertIs(Initialized, segment.param_status("end_point"))
+        self.assertIsNone(segment.param_status("length"))
+        self.assertFalse(segment.is_set("length"))
+        self.assertEqual(5, segment.length)
+        self.assertIs(Calculated, segment.param_status("length"))
+        self.assertTrue(segment.is_set("length"))
+        self.assertEqual({"start_point", "end_point", "delta", "length"}, set(segment.get_params()))
+
+    def test_resolve_plan_degenerate(self):
+        expected = set(Segment(start_point=[0, 0, 0], end_point=[1, 0, 0]).resolve().get_params())
+        self.assertIn("delta_unit", expected)
+        # the plan recorded by the first object must work for the other one in both orders:
+        for order in ((0, 1), (1, 0)):
+            Segment._plans.clear()
+            for length in order:
+                segment = Segment(start_point=[0, 0, 0], end_point=[length, 0, 0]).resolve()
+                if length:
+                    self.assertEqual(expected, set(segment.get_params()))
+                else:
+                    self.assertNotIn("delta_unit", segment.get_params())
+                    self.assertEqual(0, segment.length)
+
+    def test_from_arrays(self):
+        rng = np.random.RandomState(6)
+        start_point = rng.rand(10, 3)
+        end_point = rng.rand(10, 3)
+        for segments, param_names in (
+            (Segment.from_arrays(start_point, end_point=end_point), ("start_point", "end_point")),
+            (Segment.from_arrays(start_point, delta=end_point - start_point), ("start_point", "delta")),
+        ):
+            self.assertEqual(10, len(segments))
+            for i, segment in enumerate(segments):
+                expected = Segment(**dict((name, segments[name][i]) for name in param_names))
+                for name in segments.data.dtype.names:
+                    self.assertTrue(np.allclose(getattr(expected, name), segments[name][i]))
+                    self.assertTrue(np.allclose(getattr(expected, name), getattr(segment, name)))
+
+    def test_from_arrays_zero_length(self):
+        segments = Segment.from_arrays([[0, 0, 0], [1, 1, 1], [2, 2, 2]], end_point=[[3, 4, 0], [1, 1, 1], [2, 2, 4]])
+        self.assertTrue(np.allclose([[0.6, 0.8, 0], [0, 0, 1]], segments["delta_unit"][[0, 2]]))
+        self.assertTrue(np.all(np.isnan(segments["delta_unit"][1])))
+        self.assertTrue(segments[0].delta_unit.is_same([0.6, 0.8, 0]))
+        self.assertFalse(segments[1].is_set("delta_unit"))
+        self.assertEqual(0, segments[1].length)
+        self.assertTrue(segments[2].delta_unit.is_same([0, 0, 1]))
+
+    def test_rotate_points(self):
+        segment = Segment(start_point="1,-2,0.5", delta="0.3,1,2")
+        rng = np.random.RandomState(4)
+        points = rng.rand(10, 3) * 4 - 2
+        angles = np.array([0, 0.5, -2, 2 * np.pi])
+        result = segment.rotate_points(points, angles)
+        self.assertEqual((4, 10, 3), result.shape)
+        for i, angle in enumerate(angles):
+            for j, point in enumerate(points):
+                self.assertTrue(segment.rotate_point(point, angle).is_same(result[i, j]))
+        self.assertTrue(np.array_equal(points, result[3]))
+        self.assertEqual((10, 3), segment.rotate_points(points, 1).shape)
+        self.assertEqual((4, 3), segment.rotate_points(points[0], angles).shape)
+
 
 if __name__ == "__main__":
     unittest.main()
@@ -0,0 +1,61 @@
+import unittest
+import numpy as np
+from brlcad.vmath import Transform, Vector, VectorArray
+
+
+class TransformTestCase(unittest.TestCase):
+
+    def setUp(self):
+        rng = np.random.RandomState(3)
+        self.points = rng.rand(20, 3) * 10 - 5
+        self.transform = Transform("0, -1, 0, 1; 2, 0, 0, 2; 0, 0, 1, 3; 0.1, 0, 0, 1")
+
+    def test_apply_same_as_mul(self):
+        expected = [self.transform * Vector(point) for point in self.points]
+        self.assertTrue(np.allclose(expected, self.transform.apply(self.points)))
+
+    def test_mul_point_arrays(self):
+        for count in (3, 4, 5):
+            points = VectorArray(self.points[:count])
+            expected = self.transform.apply(points)
+            self.assertTrue(np.allclose(expected, self.transform * points))
+            self.assertTrue(np.allclose(expected, self.transform * self.points[:count]))
+
+    def test_apply_in_place(self):
+        expected = self.transform.apply(self.points)
+        points = self.points.copy()
+        result = self.transform.apply(points, out=points)
+        self.assertIs(points, result)
+        self.assertTrue(np.allclose(expected, points))
+
+    def test_apply_directions(self):
+        rotation = Transform("0, -1, 0, 1; 1, 0, 0, 2; 0, 0, 1, 3; 0, 0, 0, 1")
+        origin = rotation.apply([0, 0, 0])
+        expected = [rotation * Vector(point) - origin for point in self.points]
+        self.assertTrue(np.allclose(expected, rotation.apply_directions(self.points)))
+
+    def test_constants_are_shared_and_read_only(self):
+        self.assertIs(Transform.unit(), Transform.unit())
+        with self.assertRaises(ValueError):
+            Transform.unit()[0, 0] = 2
+        with self.assertRaises(ValueError):
+            Transform.translation(1, 2, 3)[0, 0] = 2
+        t = Transform(Transform.unit(), copy=True)
+        t[0, 0] = 2
+        self.assertEqual(1, Transform.unit()[0, 0])
+
+    def test_matrix_product(self):
+        a = Transform.rotation((1, 2, 3), 0.7, center=(1, 1, 1))
+        b = Transform.translation(4, 5, 6)
+        self.assertIsInstance(a * b, Transform)
+        self.assertTrue(np.allclose(np.dot(a, b), a * b))
+        self.assertTrue(np.allclose(a * b * a, Transform.compose(a, b, a)))
+        self.assertTrue(np.allclose(a * b * a, Transform.compose(np.array([a, b]), a)))
+        c = Transform(a, copy=True)
+        c *= b
+        self.assertTrue(np.allclose(a * b, c))
+
+    def test_inverse(self):
+        for t in (self.transform, Transform.euler(0.1, -0.4, 2), Transform.look_at((1, 2, 3), (0, 5, 0))):
+            self.assertTrue(np.allclose(Transform.unit(), t * t.inverse()))
+        self.assertTrue(np.allclose(self.transform.I, np.linalg.inv(self.transform)))
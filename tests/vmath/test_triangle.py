@@ -1,5 +1,6 @@
 import unittest
 import math
+import numpy as np
 from brlcad.vmath import Vector, Triangle
 
 
@@ -27,5 +28,33 @@ class TriangleTestCase(unittest.TestCase):
                 msg="Check failed for: {}; result is: {}".format(x, angle)
             )
 
+    def test_mesh_metrics(self):
+        rng = np.random.RandomState(8)
+        vertices = rng.rand(30, 3)
+        faces = rng.randint(0, 30, (100, 3))
+        faces[0] = (1, 1, 2)
+        vertices[3:6] = [[0, 0, 0], [1, 1, 1], [2, 2, 2]]
+        faces[1] = (3, 4, 5)
+        metrics = Triangle.mesh_metrics(vertices, faces)
+        for i, face in enumerate(faces):
+            p1, p2, p3 = [Vector(vertices[x]) for x in face]
+            cross = (p2 - p1).cross(p3 - p1)
+            degenerate = len(set(face)) < 3 or i == 1
+            self.assertEqual(degenerate, metrics["degenerate"][i])
+            self.assertAlmostEqual(0.5 * cross.norm(), metrics["areas"][i])
+            if degenerate:
+                self.assertTrue(Vector(metrics["normals"][i]).is_same([0, 0, 0]))
+                continue
+            self.assertTrue(cross.normal_copy().is_same(metrics["normals"][i]))
+            expected = [
+                Triangle.angle_from_points(p3, p1, p2),
+                Triangle.angle_from_points(p1, p2, p3),
+                Triangle.angle_from_points(p2, p3, p1),
+            ]
+            self.assertTrue(np.allclose(expected, metrics["angles"][i]))
+        self.assertTrue(np.isnan(metrics["angles"][0]).any())
+        equilateral = Triangle.mesh_metrics([[0, 0, 0], [1, 0, 0], [0.5, math.sqrt(3) / 2, 0]], [[0, 1, 2]])
+        self.assertAlmostEqual(1, equilateral["aspect_ratios"][0])
+
 if __name__ == "__main__":
     unittest.main()
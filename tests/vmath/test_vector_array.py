@@ -0,0 +1,47 @@
+import unittest
+import numpy as np
+from brlcad.vmath import Vector, VectorArray
+
+
+class VectorArrayTestCase(unittest.TestCase):
+
+    def setUp(self):
+        rng = np.random.RandomState(2)
+        values = np.round(rng.rand(50, 3) * 10 - 5)
+        values[:5] = [[0, 0, 0], [1, 0, 0], [0, -1, 0], [0, 0, 1e-9], [2, 2, 0]]
+        self.values = values
+        self.other = Vector([1, 1, 0])
+
+    def test_same_as_vector(self):
+        array = VectorArray(self.values)
+        vectors = [Vector(value) for value in self.values]
+        self.assertTrue(np.allclose([v.norm() for v in vectors], array.norm()))
+        self.assertTrue(np.allclose([v.mag() for v in vectors], array.mag()))
+        self.assertTrue(np.allclose([v.dot(self.other) for v in vectors], array.dot(self.other)))
+        self.assertTrue(np.allclose([v.cross(self.other) for v in vectors], array.cross(self.other)))
+        self.assertEqual([v.is_same(self.other) for v in vectors], array.is_same(self.other).tolist())
+        self.assertEqual([v.is_normal_to(self.other) for v in vectors], array.is_normal_to(self.other).tolist())
+        self.assertEqual([v.is_parallel_to(self.other) for v in vectors], array.is_parallel_to(self.other).tolist())
+        self.assertTrue(np.allclose([v.construct_normal() for v in vectors], array.construct_normal()))
+        self.assertTrue(np.allclose([v.normal_copy() for v in vectors], array.normal_copy()))
+
+    def test_row_by_row_operand(self):
+        array = VectorArray(self.values)
+        others = VectorArray(self.values[::-1])
+        self.assertTrue(np.allclose(
+            [Vector(a).cross(b) for a, b in zip(self.values, others)], array.cross(others)
+        ))
+        self.assertTrue(array.is_same(array.copy()).all())
+
+    def test_2d(self):
+        array = VectorArray([[1, 0], [3, -4], [0, 0]])
+        vectors = [Vector(value) for value in array]
+        self.assertTrue(np.allclose([v.construct_normal() for v in vectors], array.construct_normal()))
+        self.assertEqual([v.is_parallel_to([2, 0]) for v in vectors], array.is_parallel_to([2, 0]).tolist())
+
+    def test_result_types(self):
+        array = VectorArray(self.values)
+        self.assertIsInstance(array[0], Vector)
+        self.assertIsInstance(array[:2], VectorArray)
+        self.assertIsInstance(array - self.other, VectorArray)
+        self.assertNotIsInstance(array.sum(axis=1), VectorArray)